@@ -1,5 +1,7 @@
 from flask import Flask
 
+from .metrics import setup_metrics
+from .profiling import setup_profiling
 from .utils import setup_cache, setup_logging
 
 
@@ -13,6 +15,8 @@ def create_app(config_name: str):
 
     setup_logging(app)
     setup_cache(app)
+    setup_metrics(app)
+    setup_profiling(app)
 
     from .models import db, migrate
 
@@ -27,4 +31,8 @@ def create_app(config_name: str):
     app.register_blueprint(db_commands_bp)
     app.register_blueprint(errors_bp)
 
+    from .lifecycle import setup_worker_state
+
+    setup_worker_state(app)
+
     return app
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+
+from application.metrics import CACHE_ADMISSIONS, CACHE_EVICTIONS
+
+# translation table halving 4-bit counters of the frequency sketch
+HALVE_TABLE = bytes(count >> 1 for count in range(256))
+MAX_FREQUENCY = 15
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of network parts access frequencies (TinyLFU)
+    with `depth` rows of `width` 4-bit counters (up to 15)
+    All counters are halved after `10 * width` accesses,
+    so the frequencies reflect recent traffic
+    """
+
+    def __init__(self, width: int, depth: int = 4):
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self.mask = self.width - 1
+        self.rows = [bytearray(self.width) for _ in range(depth)]
+        self.sample_size = 10 * self.width
+        self.accesses = 0
+
+    def _indexes(self, key: str) -> list:
+        # double hashing, the second hash is odd to go through all counters
+        first_hash = hash(key)
+        second_hash = (first_hash >> 32) | 1
+        return [
+            (first_hash + row * second_hash) & self.mask
+            for row in range(len(self.rows))
+        ]
+
+    def increment(self, key: str) -> None:
+        """
+        Records an access of given key (incrementing only its lowest counters)
+        """
+
+        indexes = self._indexes(key)
+        counts = [row[index] for row, index in zip(self.rows, indexes)]
+        frequency = min(counts)
+
+        if frequency < MAX_FREQUENCY:
+            for row, index, count in zip(self.rows, indexes, counts):
+                if count == frequency:
+                    row[index] = count + 1
+
+        self.accesses += 1
+        if self.accesses >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key: str) -> int:
+        """
+        Returns estimated number of recent accesses of given key
+        """
+
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def reset(self) -> None:
+        """
+        Halves all counters (aging of frequencies)
+        """
+
+        for row in self.rows:
+            row[:] = row.translate(HALVE_TABLE)
+
+        self.accesses //= 2
+
+
+class LocalCache:
+    """
+    In-process LRU cache tier of network parts with TinyLFU admission:
+    when the cache is full, a new entry is admitted only if it is
+    more frequent than the least recently used entry (which is evicted)
+    Entries expire after `timeout` seconds
+    """
+
+    def __init__(self, capacity: int, timeout: int, sketch: FrequencySketch):
+        self.capacity = capacity
+        self.timeout = timeout
+        self.sketch = sketch
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Returns dict {key: value} of given keys found in cache
+        """
+
+        if not self.entries:
+            return {}
+
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+
+                value, expire_time = entry
+                if expire_time < now:
+                    del self.entries[key]
+                    continue
+
+                self.entries.move_to_end(key)
+                found[key] = value
+
+        return found
+
+    def set_many(self, values: dict) -> None:
+        """
+        Offers given entries to cache, admitted are these not less frequent
+        than entries they evict
+        """
+
+        if not self.capacity:
+            return
+
+        expire_time = time.monotonic() + self.timeout
+        admitted, rejected, evicted = 0, 0, 0
+
+        with self.lock:
+            for key, value in values.items():
+                if key not in self.entries and len(self.entries) >= self.capacity:
+                    victim = next(iter(self.entries))
+                    if self.sketch.frequency(key) <= self.sketch.frequency(victim):
+                        rejected += 1
+                        continue
+
+                    del self.entries[victim]
+                    evicted += 1
+
+                self.entries[key] = (value, expire_time)
+                self.entries.move_to_end(key)
+                admitted += 1
+
+        CACHE_ADMISSIONS.labels("local", "admitted").inc(admitted)
+        CACHE_ADMISSIONS.labels("local", "rejected").inc(rejected)
+        CACHE_EVICTIONS.inc(evicted)
+
+    def delete_many(self, keys: list) -> None:
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+def get_cache_timeout(frequency: int, config: dict) -> int:
+    """
+    Returns memcached expiration time of a network part with given frequency:
+    `CACHE_DEFAULT_TIMEOUT` for parts with `CACHE_ADMISSION_THRESHOLD`
+    frequency, doubled each time the frequency doubles,
+    up to `CACHE_MAX_TIMEOUT`
+    """
+
+    doublings = max(
+        frequency.bit_length() - config["CACHE_ADMISSION_THRESHOLD"].bit_length(), 0
+    )
+
+    return min(
+        config["CACHE_DEFAULT_TIMEOUT"] << doublings, config["CACHE_MAX_TIMEOUT"]
+    )
@@ -8,7 +8,28 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY")
     MEMCACHED_SERVER = os.environ.get("MEMCACHED_SERVER")
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get("CACHE_DEFAULT_TIMEOUT"))
+    CACHE_MAX_TIMEOUT = int(os.environ.get("CACHE_MAX_TIMEOUT", 86400))
+    CACHE_ADMISSION_THRESHOLD = int(os.environ.get("CACHE_ADMISSION_THRESHOLD", 2))
+    FREQUENCY_SKETCH_WIDTH = int(os.environ.get("FREQUENCY_SKETCH_WIDTH", 65536))
+    LOCAL_CACHE_SIZE = int(os.environ.get("LOCAL_CACHE_SIZE", 10000))
+    LOCAL_CACHE_TIMEOUT = int(os.environ.get("LOCAL_CACHE_TIMEOUT", 60))
+    PREFIX_LENGTHS_REFRESH_INTERVAL = int(
+        os.environ.get("PREFIX_LENGTHS_REFRESH_INTERVAL", 60)
+    )
+    PRELOAD_INDEX = os.environ.get("PRELOAD_INDEX", "false") == "true"
+    CACHE_INVALIDATION_LISTENER = (
+        os.environ.get("CACHE_INVALIDATION_LISTENER", "false") == "true"
+    )
     DB_JSON_PATH = Path(os.environ.get("DB_JSON_PATH")).resolve()
+    HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", 60))
+    REPORT_COMPRESSION = os.environ.get("REPORT_COMPRESSION", "false") == "true"
+
+    IP_TAGS_BATCH_MAX_SIZE = int(os.environ.get("IP_TAGS_BATCH_MAX_SIZE", 1000))
+
+    NETWORK_TAGS_PAGE_SIZE = int(os.environ.get("NETWORK_TAGS_PAGE_SIZE", 1000))
+    NETWORK_TAGS_MAX_PAGE_SIZE = int(
+        os.environ.get("NETWORK_TAGS_MAX_PAGE_SIZE", 10000)
+    )
 
     user = os.environ.get("POSTGRES_USER")
     password = os.environ.get("POSTGRES_PASSWORD")
@@ -26,6 +47,11 @@ class Config:
     LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES"))
     LOG_LEVEL = os.environ.get("LOG_LEVEL")
 
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false") == "true"
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "./logs/profiles")).resolve()
+    SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -40,3 +66,9 @@ class TestingConfig(Config):
 
     TESTING = True
     ENDPOINT_CASES_PATH = Path(os.environ.get("ENDPOINT_CASES_PATH")).resolve()
+
+
+class BenchmarkConfig(Config):
+    """Benchmark configuration (in-memory database)"""
+
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
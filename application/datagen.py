@@ -0,0 +1,143 @@
+import json
+import random
+from collections import deque
+from typing import IO, Iterator
+
+# prefix length: weight, roughly following public routing tables
+DEFAULT_PREFIX_LENGTHS = "8:1,12:1,16:4,20:6,22:8,24:30,28:10,29:5,30:5,32:30"
+
+# code points used for unicode tags (latin letters with diacritics,
+# greek, CJK ideographs, symbols)
+UNICODE_RANGES = (
+    (0x00C0, 0x017F),
+    (0x0391, 0x03C9),
+    (0x4E00, 0x9FFF),
+    (0x2600, 0x26FF),
+)
+
+
+def parse_prefix_lengths(spec: str) -> dict:
+    """
+    Parses prefix lengths distribution given as `length:weight,...`
+    (like `8:1,16:4,24:30`) and returns dict {length: weight}
+    At least one of weights must be positive
+    """
+
+    distribution = {}
+    for item in spec.split(","):
+        length, _, weight = item.partition(":")
+        length, weight = int(length), float(weight or 1)
+
+        if not 0 <= length <= 32 or weight < 0:
+            raise ValueError(f"Invalid prefix length distribution item: {item}")
+
+        distribution[length] = weight
+
+    if not any(distribution.values()):
+        raise ValueError(f"Prefix length distribution has no positive weight: {spec}")
+
+    return distribution
+
+
+def generate_tags(count: int, unicode_rate: float, rand: random.Random) -> list:
+    """
+    Returns list of `count` unique tags, `unicode_rate` of them
+    built from non-ASCII characters
+    """
+
+    tags = []
+    for index in range(count):
+        if rand.random() < unicode_rate:
+            low, high = rand.choice(UNICODE_RANGES)
+            word = "".join(
+                chr(rand.randint(low, high)) for _ in range(rand.randint(1, 8))
+            )
+            tags.append(f"{word} {index}")
+        else:
+            tags.append(f"tag-{index}")
+
+    return tags
+
+
+def generate_records(
+    count: int,
+    seed: int = None,
+    prefix_lengths: str = DEFAULT_PREFIX_LENGTHS,
+    max_depth: int = 3,
+    nesting_rate: float = 0.3,
+    tags_count: int = 10000,
+    duplicate_rate: float = 0.05,
+    unicode_rate: float = 0.1,
+) -> Iterator[dict]:
+    """
+    Generates `count` records in knowledge base format
+    ({"tag": ..., "ip_network": ...}), with:
+    - `prefix_lengths` - distribution of networks prefix lengths
+    - `nesting_rate` - part of networks being subnets of earlier ones,
+                       nested up to `max_depth` levels
+    - `tags_count` - number of unique tags
+    - `duplicate_rate` - part of records repeating earlier ones
+    - `unicode_rate` - part of tags with non-ASCII characters
+    Records are generated lazily, only the last networks are kept in memory
+    The same `seed` gives the same records
+    """
+
+    rand = random.Random(seed)
+    distribution = parse_prefix_lengths(prefix_lengths)
+    lengths, weights = list(distribution), list(distribution.values())
+    tags = generate_tags(tags_count, unicode_rate, rand)
+
+    # recent networks as (address, prefix length, depth) and records
+    recent_networks = deque(maxlen=1000)
+    recent_records = deque(maxlen=1000)
+
+    for _ in range(count):
+        if recent_records and rand.random() < duplicate_rate:
+            yield rand.choice(recent_records)
+            continue
+
+        net_digits = rand.choices(lengths, weights)[0]
+        address, depth = rand.getrandbits(32), 0
+
+        if recent_networks and rand.random() < nesting_rate:
+            parent_address, parent_digits, parent_depth = rand.choice(recent_networks)
+
+            if parent_depth < max_depth and parent_digits < 32:
+                # subnet of the parent network: parent bits and random host bits
+                net_digits = max(net_digits, parent_digits + 1)
+                host_mask = (1 << (32 - parent_digits)) - 1
+                address = parent_address | (address & host_mask)
+                depth = parent_depth + 1
+
+        address &= ~((1 << (32 - net_digits)) - 1) & 0xFFFFFFFF
+        recent_networks.append((address, net_digits, depth))
+
+        record = {
+            "tag": rand.choice(tags),
+            "ip_network": f"{int_to_ipv4(address)}/{net_digits}",
+        }
+        recent_records.append(record)
+
+        yield record
+
+
+def write_records(records: Iterator[dict], file: IO) -> int:
+    """
+    Writes records to given file as json list, one record per line
+    Returns number of written records
+    """
+
+    count = 0
+    file.write("[")
+    for count, record in enumerate(records, 1):
+        file.write(("\n" if count == 1 else ",\n") + json.dumps(record))
+
+    file.write("\n]\n")
+
+    return count
+
+
+def int_to_ipv4(address: int) -> str:
+    """Converts 32-bit integer to IPv4 address"""
+
+    return ".".join(str(address >> shift & 255) for shift in (24, 16, 8, 0))
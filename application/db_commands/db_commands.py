@@ -1,10 +1,124 @@
+import sys
+from contextlib import contextmanager
+
+import click
 from flask import current_app
+from sqlalchemy import event, text
 
-from application.models import NetworkTag, db
-from application.utils import prepare_data_to_db
+from application.datagen import (
+    DEFAULT_PREFIX_LENGTHS,
+    generate_records,
+    parse_prefix_lengths,
+    write_records,
+)
+from application.dump import DumpReader, DumpWriter, open_dump
+from application.invalidation import ALL_CHANGED_PAYLOAD, NOTIFY_CHANNEL
+from application.models import NetworkTag, TagNetwork, db
+from application.utils import prepare_data_to_db, prepare_tag_networks_to_db
 
 from . import db_commands_bp
 
+DUMP_SQL = """
+    COPY (
+        SELECT binary_network_part, tags FROM network_tags
+        ORDER BY binary_network_part
+    ) TO STDOUT
+"""
+RESTORE_SQL = "COPY network_tags (binary_network_part, tags) FROM STDIN"
+REBUILD_TAG_NETWORKS_SQL = """
+    INSERT INTO tag_networks (tag, binary_network_part)
+    SELECT tag, binary_network_part
+    FROM network_tags, json_array_elements_text(tags::json) AS tag
+"""
+# notifications of `network_tags_changed` trigger are suppressed
+# in current transaction (only)
+BULK_CHANGE_SQL = "SELECT set_config('network_tags.bulk_change', 'on', true);"
+NOTIFY_SQL = "SELECT pg_notify(:channel, :payload);"
+
+
+def validate_prefix_lengths(ctx, param, value: str) -> str:
+    """Click callback validating prefix lengths distribution option"""
+
+    try:
+        parse_prefix_lengths(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+
+    return value
+
+
+def add_all_in_parts(objects: list, part_size: int = 500000) -> None:
+    """Adds given objects to the database, committing every `part_size` records"""
+
+    for index in range(0, len(objects), part_size):
+        db.session.add_all(objects[index : index + part_size])
+        db.session.commit()
+
+
+def notify_all_changed() -> None:
+    """
+    Flushes memcached and notifies app workers that all the data have been
+    changed (they clear their in-process caches after the flush, so they
+    do not copy stale entries from memcached)
+    """
+
+    current_app.cache.flush_all()
+
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(
+            NOTIFY_SQL, {"channel": NOTIFY_CHANNEL, "payload": ALL_CHANGED_PAYLOAD}
+        )
+        db.session.commit()
+
+
+def prime_cache_with_networks(batch_size: int) -> None:
+    """Sets all networks from `network_tags` table in memcached"""
+
+    timeout = current_app.config["CACHE_DEFAULT_TIMEOUT"]
+    query = db.session.query(NetworkTag.binary_network_part, NetworkTag.tags)
+
+    batch = {}
+    for binary_network_part, tags in query.yield_per(batch_size):
+        batch[binary_network_part] = tags
+        if len(batch) >= batch_size:
+            current_app.cache.set_many(batch, expire=timeout)
+            batch.clear()
+
+    current_app.cache.set_many(batch, expire=timeout)
+
+
+@contextmanager
+def all_data_changing():
+    """
+    Suppresses notifications of `network_tags_changed` trigger in transactions
+    of the session while changing many rows, they are replaced with one
+    notification about all the data (also after an error, as some rows
+    may be committed)
+    Other sessions are still notified about their changes
+    """
+
+    if db.engine.dialect.name != "postgresql":
+        # the trigger exists only in PostgreSQL
+        yield
+        return
+
+    session = db.session()
+
+    def suppress_notifications(session, transaction, connection):
+        connection.execute(text(BULK_CHANGE_SQL))
+
+    event.listen(session, "after_begin", suppress_notifications)
+    try:
+        if session.in_transaction():
+            session.execute(text(BULK_CHANGE_SQL))
+
+        yield
+
+    finally:
+        event.remove(session, "after_begin", suppress_notifications)
+        session.rollback()
+        notify_all_changed()
+
 
 @db_commands_bp.cli.group()
 def db_manage():
@@ -20,24 +134,17 @@ def add_data():
     try:
         prepared_data_to_db = prepare_data_to_db(current_app.config["DB_JSON_PATH"])
         all_network_tags_objects = [NetworkTag(**el) for el in prepared_data_to_db]
-        tags_length = len(all_network_tags_objects)
-
-        if tags_length > 500000:
-            # inserting every 500k records
-            parts_500k_number = tags_length // 500000
-            for i in range(0, parts_500k_number):
-                partial_data = all_network_tags_objects[i * 500000 : (i + 1) * 500000]
-                db.session.add_all(partial_data)
-                db.session.commit()
-
-            # last partial data
-            partial_data = all_network_tags_objects[parts_500k_number * 500000 :]
-            db.session.add_all(partial_data)
-            db.session.commit()
 
-        else:
-            db.session.add_all(all_network_tags_objects)
-            db.session.commit()
+        # inverted index tag -> networks
+        all_tag_networks_objects = [
+            TagNetwork(**el) for el in prepare_tag_networks_to_db(prepared_data_to_db)
+        ]
+
+        with all_data_changing():
+            add_all_in_parts(all_network_tags_objects)
+            add_all_in_parts(all_tag_networks_objects)
+        NetworkTag.reset_prefix_lengths()
+        NetworkTag.bump_dataset_generation()
 
         msg = (
             "Data has been added to database"
@@ -58,8 +165,12 @@ def remove_data():
     """Remove all data from the database"""
 
     try:
-        db.session.execute("DELETE FROM network_tags;")
-        db.session.commit()
+        with all_data_changing():
+            db.session.execute("DELETE FROM tag_networks;")
+            db.session.execute("DELETE FROM network_tags;")
+            db.session.commit()
+        NetworkTag.reset_prefix_lengths()
+        NetworkTag.bump_dataset_generation()
 
         msg = "All data has been deleted from database"
         current_app.logger.info(msg)
@@ -68,3 +179,113 @@ def remove_data():
     except Exception as exc:
         msg = f"Error during removing data from the database: {exc}"
         current_app.logger.error(msg)
+
+
+@db_manage.command()
+@click.argument("output", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--count", default=1000000, help="Number of records")
+@click.option("--seed", default=None, type=int, help="Seed for reproducible data")
+@click.option(
+    "--prefix-lengths",
+    default=DEFAULT_PREFIX_LENGTHS,
+    callback=validate_prefix_lengths,
+    help="Prefix lengths distribution as length:weight,...",
+)
+@click.option("--max-depth", default=3, help="Maximal nesting depth of networks")
+@click.option("--nesting-rate", default=0.3, help="Part of nested networks")
+@click.option("--tags-count", default=10000, help="Number of unique tags")
+@click.option("--duplicate-rate", default=0.05, help="Part of duplicated records")
+@click.option("--unicode-rate", default=0.1, help="Part of tags with unicode")
+def generate_data(output, count, seed, **options):
+    """Generate synthetic data in `add-data` format to OUTPUT file (- for stdout)"""
+
+    try:
+        records = generate_records(count, seed, **options)
+
+        if output == "-":
+            write_records(records, sys.stdout)
+        else:
+            with open(output, "w") as file:
+                write_records(records, file)
+
+            msg = f"{count} records have been generated (file: {output})"
+            current_app.logger.info(msg)
+
+    except Exception:
+        msg = f"Error during generating data (file: {output})"
+        current_app.logger.error(msg, exc_info=True)
+
+
+@db_manage.command()
+@click.argument("output", type=click.Path(dir_okay=False, allow_dash=True))
+def dump(output):
+    """Dump `network_tags` data to compressed OUTPUT file (- for stdout)"""
+
+    try:
+        connection = db.engine.raw_connection()
+        try:
+            with open_dump(output, "wb") as file:
+                writer = DumpWriter(file)
+                connection.cursor().copy_expert(DUMP_SQL, writer)
+                writer.finish()
+
+        finally:
+            connection.close()
+
+        msg = f"{writer.rows} records have been dumped (file: {output})"
+        current_app.logger.info(msg)
+
+    except Exception:
+        msg = f"Error during dumping data (file: {output})"
+        current_app.logger.error(msg, exc_info=True)
+
+
+@db_manage.command()
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--prime-cache", is_flag=True, help="Set restored networks in memcached")
+@click.option("--batch-size", default=10000, help="Networks set in cache at once")
+def restore(path, prime_cache, batch_size):
+    """
+    Replace all data in the database with the dump from PATH file (- for stdin)
+    Intended for provisioning of new environments
+    """
+
+    try:
+        connection = db.engine.raw_connection()
+        try:
+            with open_dump(path, "rb") as file:
+                reader = DumpReader(file)
+
+                # notifications about each row are replaced with one,
+                # sent after the data are committed
+                cursor = connection.cursor()
+                cursor.execute(BULK_CHANGE_SQL)
+                cursor.execute("TRUNCATE tag_networks, network_tags;")
+                cursor.copy_expert(RESTORE_SQL, reader)
+                reader.verify()
+
+            cursor.execute(REBUILD_TAG_NETWORKS_SQL)
+            connection.commit()
+
+        except Exception:
+            connection.rollback()
+            raise
+
+        finally:
+            connection.close()
+
+        # cache is flushed and primed only with committed data
+        notify_all_changed()
+        if prime_cache:
+            prime_cache_with_networks(batch_size)
+
+        NetworkTag.reset_prefix_lengths()
+        NetworkTag.bump_dataset_generation()
+
+        msg = f"{reader.rows} records have been restored (file: {path})"
+        current_app.logger.info(msg)
+        print(msg)
+
+    except Exception:
+        msg = f"Error during restoring data (file: {path})"
+        current_app.logger.error(msg, exc_info=True)
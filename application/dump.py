@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import sys
+from typing import IO
+
+# dump of `network_tags` table (gzip-compressed):
+# - header line with format version
+# - rows in PostgreSQL COPY text format (binary network part, tags)
+# - end of data marker (like in COPY) and trailer line with sha256
+#   checksum of the rows and their number
+DUMP_HEADER = b"network-tags-dump 1\n"
+END_OF_DATA = b"\\.\n"
+
+
+class DumpError(Exception):
+    """Invalid or damaged dump file"""
+
+
+def open_dump(path: str, mode: str) -> IO:
+    """
+    Opens compressed dump file for reading (`rb`) or writing (`wb`),
+    `-` means stdin or stdout
+    """
+
+    if path == "-":
+        stream = sys.stdin.buffer if mode == "rb" else sys.stdout.buffer
+        return gzip.GzipFile(fileobj=stream, mode=mode)
+
+    return gzip.open(path, mode)
+
+
+class DumpWriter:
+    """
+    File-like object written by COPY TO, saving rows to given (compressed)
+    dump file and counting their checksum
+    """
+
+    def __init__(self, file: IO):
+        self.file = file
+        self.checksum = hashlib.sha256()
+        self.rows = 0
+
+        file.write(DUMP_HEADER)
+
+    def write(self, data: bytes) -> None:
+        self.checksum.update(data)
+        self.rows += data.count(b"\n")
+        self.file.write(data)
+
+    def finish(self) -> None:
+        """
+        Writes end of data marker and trailer with checksum
+        """
+
+        self.file.write(END_OF_DATA)
+        self.file.write(f"sha256 {self.checksum.hexdigest()} {self.rows}\n".encode())
+
+
+class DumpReader:
+    """
+    File-like object read by COPY FROM, reading rows from given (decompressed)
+    dump file and counting their checksum
+    """
+
+    def __init__(self, file: IO):
+        if file.readline() != DUMP_HEADER:
+            raise DumpError("Not a network-tags dump file (or unsupported version)")
+
+        self.file = file
+        self.checksum = hashlib.sha256()
+        self.rows = 0
+        self.finished = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self.finished:
+            return b""
+
+        lines, length = [], 0
+        while size < 0 or length < size:
+            line = self.file.readline()
+            if line == END_OF_DATA:
+                self.finished = True
+                break
+
+            if not line.endswith(b"\n"):
+                raise DumpError("Dump file is truncated")
+
+            lines.append(line)
+            length += len(line)
+
+        data = b"".join(lines)
+        self.checksum.update(data)
+        self.rows += len(lines)
+
+        return data
+
+    def verify(self) -> None:
+        """
+        Checks checksum and number of read rows with the dump trailer
+        """
+
+        expected = f"sha256 {self.checksum.hexdigest()} {self.rows}\n".encode()
+        if not self.finished or self.file.readline() != expected:
+            raise DumpError("Checksum of dump file does not match")
@@ -1,5 +1,16 @@
 from flask import Blueprint
+from werkzeug.routing import PathConverter
+
+
+class TagConverter(PathConverter):
+    """Path converter matching also tags with new line characters"""
+
+    regex = r"[^/](?:.|\n)*?"
+
 
 endpoints_bp = Blueprint("endpoints", __name__, template_folder="templates")
+endpoints_bp.record_once(
+    lambda state: state.app.url_map.converters.setdefault("tag", TagConverter)
+)
 
 from . import endpoints
@@ -1,51 +1,209 @@
-from flask import abort, current_app, jsonify, render_template
+import json
 
-from application.models import NetworkTag
-from application.utils import is_valid_ipv4
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+
+from application import lifecycle
+from application.metrics import metrics_response
+from application.models import MATCH_MODES, NetworkTag, TagNetwork
+from application.profiling import stage
+from application.utils import (
+    convert_binary_to_ip_network,
+    convert_ip_network_to_binary,
+    convert_ip_to_binary,
+    convert_ips_to_binary,
+    is_valid_ip_network,
+)
 
 from . import endpoints_bp
+from .responses import (
+    get_report_encoding,
+    is_not_modified,
+    make_ip_etag,
+    not_modified_response,
+    report_response,
+    set_cache_headers,
+    tags_response,
+)
 
 
-# TODO: Moving function to start just after starting app
 @endpoints_bp.before_app_first_request
-def fill_in_cache():
+def start_worker():
     """
-    Loading data from the database to memcached
+    Starting the worker of development server
+    (gunicorn workers are started just after fork, in `post_fork` hook)
     """
-    try:
-        NetworkTag.fill_in_cache(100)
-        current_app.logger.info("Data from `network_tags` has been initially cached")
 
-    except Exception:
-        current_app.logger.error("Error during initial caching data", exc_info=True)
+    lifecycle.start_worker(current_app._get_current_object())
+
+
+def get_match_mode(match: str) -> str:
+    """
+    Returns given lookup match mode (`all` by default),
+    aborts request if the mode is not supported
+    """
+
+    if match is None:
+        return "all"
+
+    if match not in MATCH_MODES:
+        abort(400, description=f"Match mode {match} is not supported")
+
+    return match
 
 
 @endpoints_bp.route("/ip-tags/<string:ip>", methods=["GET"])
 def get_ip_tags(ip: str):
-    if not is_valid_ipv4(ip):
-        abort(400, description=f"Address {ip} does not have IPv4 format")
+    with stage("validation"):
+        binary_ip = convert_ip_to_binary(ip)
+        if not binary_ip:
+            abort(400, description=f"Address {ip} does not have IPv4 or IPv6 format")
+        match = get_match_mode(request.args.get("match"))
+
+    with stage("etag"):
+        etag = make_ip_etag(binary_ip, match)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
 
     tags = ""
     try:
-        tags = NetworkTag.get_tags_for_ip(ip)
+        tags = NetworkTag.get_tags_for_ip(ip, match, binary_ip)
 
     except Exception:
         current_app.logger.error("Error in get_ip_tags: ", exc_info=True)
+        etag = None
+
+    with stage("encode"):
+        return set_cache_headers(tags_response(tags), etag)
+
+
+@endpoints_bp.route("/ip-tags", methods=["POST"])
+def get_ips_tags():
+    data = request.get_json(silent=True)
+    ips = data.get("ips") if isinstance(data, dict) else None
+
+    if not isinstance(ips, list) or not all(isinstance(ip, str) for ip in ips):
+        abort(400, description="Request body should have `ips` list of addresses")
+
+    max_size = current_app.config["IP_TAGS_BATCH_MAX_SIZE"]
+    if len(ips) > max_size:
+        abort(400, description=f"Number of addresses exceeds {max_size}")
+
+    binary_ips = convert_ips_to_binary(ips)
+    for ip, binary_ip in zip(ips, binary_ips):
+        if not binary_ip:
+            abort(400, description=f"Address {ip} does not have IPv4 or IPv6 format")
+
+    match = get_match_mode(data.get("match"))
+
+    try:
+        tags = NetworkTag.get_tags_for_ips(ips, match, binary_ips)
+
+    except Exception:
+        current_app.logger.error("Error in get_ips_tags: ", exc_info=True)
+        abort(500, description="Error in getting tags of addresses")
 
     return jsonify(tags)
 
 
 @endpoints_bp.route("/ip-tags-report/<string:ip>", methods=["GET"])
 def get_ip_tags_report(ip: str):
-    if not is_valid_ipv4(ip):
-        abort(400, description=f"Address {ip} does not have IPv4 format")
+    with stage("validation"):
+        binary_ip = convert_ip_to_binary(ip)
+        if not binary_ip:
+            abort(400, description=f"Address {ip} does not have IPv4 or IPv6 format")
+        match = get_match_mode(request.args.get("match"))
+
+    with stage("etag"):
+        encoding = get_report_encoding()
+        etag = make_ip_etag(binary_ip, match, encoding)
+        if is_not_modified(etag):
+            vary = (
+                "Accept-Encoding" if current_app.config["REPORT_COMPRESSION"] else None
+            )
+            return not_modified_response(etag, vary)
 
     tags = ""
     try:
-        tags = NetworkTag.get_tags_for_ip(ip)
+        tags = NetworkTag.get_tags_for_ip(ip, match, binary_ip)
 
     except Exception:
         current_app.logger.error("Error in get_ip_tags_report: ", exc_info=True)
+        etag = None
+
+    with stage("render"):
+        return set_cache_headers(report_response(ip, tags, encoding), etag)
+
+
+@endpoints_bp.route("/tags/<tag:tag>/networks", methods=["GET"])
+def get_tag_networks(tag: str):
+    networks = []
+    try:
+        networks = [
+            convert_binary_to_ip_network(binary_part)
+            for binary_part in TagNetwork.get_networks_for_tag(tag)
+        ]
+
+    except Exception:
+        current_app.logger.error("Error in get_tag_networks: ", exc_info=True)
+
+    return jsonify(networks)
+
+
+@endpoints_bp.route("/network-tags/<path:network>", methods=["GET"])
+def get_network_tags(network: str):
+    if not is_valid_ip_network(network):
+        abort(400, description=f"Network {network} does not have CIDR format")
+
+    after = request.args.get("after")
+    if after is not None and not is_valid_ip_network(after):
+        abort(400, description=f"Network {after} does not have CIDR format")
+
+    limit = request.args.get(
+        "limit", current_app.config["NETWORK_TAGS_PAGE_SIZE"], type=int
+    )
+    limit = min(max(limit, 1), current_app.config["NETWORK_TAGS_MAX_PAGE_SIZE"])
+
+    query = NetworkTag.get_networks_for_range(
+        convert_ip_network_to_binary(network),
+        after=after and convert_ip_network_to_binary(after),
+        limit=limit + 1,
+    )
+
+    def generate():
+        # tags are stored already serialized, so they are put as they are
+        yield '{"networks":['
+
+        ip_network, next_network = None, None
+        try:
+            for index, network_tag in enumerate(query.yield_per(500)):
+                if index == limit:
+                    # one more record than requested means the next page exists
+                    next_network = ip_network
+                    break
+
+                ip_network = convert_binary_to_ip_network(
+                    network_tag.binary_network_part
+                )
+                yield (
+                    ("," if index else "")
+                    + f'{{"ip_network":{json.dumps(ip_network)},'
+                    + f'"tags":{network_tag.tags}}}'
+                )
+
+        except Exception:
+            current_app.logger.error("Error in get_network_tags: ", exc_info=True)
+
+        yield f'],"next":{json.dumps(next_network)}}}'
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+@endpoints_bp.route("/ready", methods=["GET"])
+def get_ready():
+    readiness = lifecycle.get_readiness(current_app._get_current_object())
+    return jsonify(readiness), 200 if readiness["ready"] else 503
+
 
-    ctx = {"ip": ip, "tags": tags}
-    return render_template("endpoints/ip_tags_report.html", **ctx)
+@endpoints_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    return metrics_response()
@@ -0,0 +1,172 @@
+import gzip
+import json
+from functools import lru_cache
+
+from flask import Response, current_app, jsonify, render_template, request
+
+from application.models import NetworkTag
+from application.utils import IPV6_KEY_PREFIX
+
+try:
+    import brotli
+except ImportError:  # brotli is an optional dependency
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+# marker rendered in place of IP address in cached reports
+REPORT_IP_PLACEHOLDER = "\x00ip\x00"
+
+
+def make_ip_etag(binary_ip: str, match: str = "all", encoding: str = None) -> str:
+    """
+    Returns ETag for responses about IP address of given binary key
+    (see `convert_ip_to_binary`), built from the dataset generation,
+    the address, the lookup match mode (other than default `all`)
+    and the content encoding of compressed response
+    Returns None when the dataset generation is unknown
+    """
+
+    generation = NetworkTag.get_dataset_generation()
+    if generation is None:
+        return None
+
+    binary_ip = binary_ip.replace(IPV6_KEY_PREFIX, "", 1)
+    etag = f"{generation}-{int(binary_ip, 2):0{len(binary_ip) // 4}x}"
+
+    if match != "all":
+        etag = f"{etag}-{match}"
+
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def is_not_modified(etag: str) -> bool:
+    """
+    Returns True if client sent in `If-None-Match` header given ETag
+    """
+
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+
+def set_cache_headers(response: Response, etag: str) -> Response:
+    """
+    Sets `ETag` and `Cache-Control` headers in given response
+    """
+
+    if etag is not None:
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config["HTTP_CACHE_MAX_AGE"]
+
+    return response
+
+
+def not_modified_response(etag: str, vary: str = None) -> Response:
+    """
+    Returns `304 Not Modified` response with cache headers
+    (and `Vary` header with given request header name)
+    """
+
+    response = Response(status=304)
+    if vary:
+        response.vary.add(vary)
+
+    return set_cache_headers(response, etag)
+
+
+@lru_cache(maxsize=4096)
+def encode_tags(tags: tuple) -> bytes:
+    """
+    Returns given tags encoded to JSON bytes, the same as `jsonify` does
+    (compact, ASCII only, with new line at the end)
+    orjson is used (if installed) only for tags without any character
+    escaped by `json` in ASCII mode, as it does not escape them
+    """
+
+    if orjson and all(tag.isascii() and "\x7f" not in tag for tag in tags):
+        return orjson.dumps(tags) + b"\n"
+
+    return (json.dumps(tags, separators=(",", ":")) + "\n").encode("ascii")
+
+
+def tags_response(tags: list) -> Response:
+    """
+    Returns JSON response with given tags, with body encoded by `encode_tags`
+    Falls back to `jsonify` when app settings change its output format
+    """
+
+    if (
+        current_app.debug
+        or current_app.config.get("JSONIFY_PRETTYPRINT_REGULAR")
+        or not current_app.config.get("JSON_AS_ASCII", True)
+    ):
+        return jsonify(tags)
+
+    return Response(encode_tags(tuple(tags)), mimetype="application/json")
+
+
+@lru_cache(maxsize=4096)
+def render_report_parts(tags: tuple) -> tuple:
+    """
+    Renders `ip_tags_report.html` for given tags and returns it split on
+    the place of the IP address. Reports depend only on the IP address and
+    its tags, so the rendered parts are cached by tags
+    """
+
+    report = render_template(
+        "endpoints/ip_tags_report.html", ip=REPORT_IP_PLACEHOLDER, tags=tags
+    )
+
+    return tuple(report.split(REPORT_IP_PLACEHOLDER))
+
+
+@lru_cache(maxsize=1024)
+def compress_report(tags: tuple, ip: str, encoding: str) -> bytes:
+    """
+    Returns report for given IP address and tags compressed with
+    given encoding (`br` or `gzip`)
+    """
+
+    report = ip.join(render_report_parts(tags)).encode("utf-8")
+
+    if encoding == "br":
+        return brotli.compress(report)
+
+    return gzip.compress(report)
+
+
+def get_report_encoding() -> str:
+    """
+    Returns encoding of report (`br` or `gzip`) accepted by client
+    Returns None if compression is not enabled in `REPORT_COMPRESSION`
+    setting or not accepted by client
+    """
+
+    if not current_app.config["REPORT_COMPRESSION"]:
+        return None
+
+    return request.accept_encodings.best_match(["br", "gzip"] if brotli else ["gzip"])
+
+
+def report_response(ip: str, tags: list, encoding: str = None) -> Response:
+    """
+    Returns response with HTML report for given IP address and tags
+    compressed with given encoding (see `get_report_encoding`)
+    """
+
+    tags = tuple(tags)
+    response = Response(mimetype="text/html")
+
+    if current_app.config["REPORT_COMPRESSION"]:
+        response.vary.add("Accept-Encoding")
+
+    if encoding:
+        response.set_data(compress_report(tags, ip, encoding))
+        response.content_encoding = encoding
+    else:
+        response.set_data(ip.join(render_report_parts(tags)))
+
+    return response
@@ -23,3 +23,9 @@ class ErrorResponse:
 def bad_request_error(err):
     current_app.logger.error(str(err))
     return ErrorResponse(str(err), 400).to_response()
+
+
+@errors_bp.app_errorhandler(500)
+def internal_server_error(err):
+    current_app.logger.error(str(err))
+    return ErrorResponse(str(err), 500).to_response()
@@ -0,0 +1,57 @@
+from typing import Iterable
+
+
+class NetworkIndex:
+    """
+    In-process index of all networks from `network_tags` table
+    {binary network part: tags (serialized)}
+    Loaded in gunicorn master before forking workers (see `application.lifecycle`),
+    so they share its memory pages copy-on-write
+    Network parts absent in the loaded index do not exist in database
+    """
+
+    def __init__(self):
+        self.networks = None
+
+    def __len__(self):
+        return len(self.networks or ())
+
+    @property
+    def loaded(self) -> bool:
+        return self.networks is not None
+
+    def load(self, rows: Iterable) -> None:
+        """
+        Loads index from (binary network part, tags) rows
+        """
+
+        self.networks = dict(rows)
+
+    def get_many(self, binary_parts: list) -> dict:
+        """
+        Returns dict {binary network part: tags} of given parts existing in index
+        """
+
+        # parts may be removed meanwhile by `update` (in invalidation thread)
+        networks = self.networks
+        found = {}
+        for part in binary_parts:
+            tags = networks.get(part)
+            if tags is not None:
+                found[part] = tags
+
+        return found
+
+    def update(self, binary_parts: list, rows: Iterable) -> None:
+        """
+        Replaces given network parts with (binary network part, tags) rows
+        Parts without rows (deleted from database) are removed from index
+        """
+
+        for part in binary_parts:
+            self.networks.pop(part, None)
+
+        self.networks.update(rows)
+
+
+network_index = NetworkIndex()
@@ -0,0 +1,135 @@
+import select
+import threading
+import time
+
+import psycopg2
+from flask import Flask, current_app
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from application.models import NetworkTag, db
+
+NOTIFY_CHANNEL = "network_tags_changed"
+
+# payload notifying about changing all the data (by `db-manage` commands)
+ALL_CHANGED_PAYLOAD = "*"
+
+# seconds between reconnections of the listener
+RECONNECT_INTERVAL = 5
+
+# functions invalidating in-process entries for given binary network parts
+invalidators = []
+
+
+def register_invalidator(func):
+    """
+    Registers function called with the list of changed binary network parts,
+    or with None when all of them have been changed
+    """
+
+    invalidators.append(func)
+    return func
+
+
+def invalidate(binary_parts: list) -> None:
+    """
+    Removes given binary network parts from memcached and in-process caches,
+    adds their prefix lengths to the known ones and starts the new generation
+    of data (changing ETags)
+    """
+
+    current_app.cache.delete_many(binary_parts)
+    current_app.local_cache.delete_many(binary_parts)
+    NetworkTag.add_prefix_lengths(binary_parts)
+
+    for func in invalidators:
+        func(binary_parts)
+
+    NetworkTag.bump_dataset_generation()
+
+
+def invalidate_all() -> None:
+    """
+    Clears in-process caches and known prefix lengths after changing
+    all the data (memcached is flushed by `db-manage` commands)
+    """
+
+    current_app.local_cache.clear()
+    NetworkTag.reset_prefix_lengths()
+
+    for func in invalidators:
+        func(None)
+
+
+def handle_notifications(payloads: set) -> None:
+    """
+    Invalidates network parts from given payloads of notifications,
+    or all the data if any of them is about all the data
+    """
+
+    if ALL_CHANGED_PAYLOAD in payloads:
+        invalidate_all()
+    else:
+        invalidate(sorted(payloads))
+
+
+def listen_for_changes(app: Flask, stop: threading.Event = None) -> None:
+    """
+    Listens for notifications about changed `network_tags` rows (sent by
+    `network_tags_changed` trigger) and invalidates cached network parts
+    (until `stop` event is set)
+    Reconnects to the database after errors, then invalidates all the data,
+    as notifications sent while reconnecting have been lost
+    """
+
+    reconnecting = False
+    while stop is None or not stop.is_set():
+        conn = None
+        try:
+            with app.app_context():
+                connect_args = db.engine.url.translate_connect_args(
+                    username="user", database="dbname"
+                )
+
+            conn = psycopg2.connect(**connect_args)
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL};")
+            app.logger.info("Listening for `network_tags` changes")
+
+            if reconnecting:
+                with app.app_context():
+                    invalidate_all()
+                    NetworkTag.bump_dataset_generation()
+                reconnecting = False
+
+            while stop is None or not stop.is_set():
+                if select.select([conn], [], [], 1) == ([], [], []):
+                    continue
+
+                conn.poll()
+                payloads = set()
+                while conn.notifies:
+                    payloads.add(conn.notifies.pop().payload)
+
+                with app.app_context():
+                    handle_notifications(payloads)
+
+                app.logger.debug(f"{len(payloads)} network parts invalidated")
+
+        except Exception:
+            app.logger.error("Error in listening for changes", exc_info=True)
+            reconnecting = True
+            time.sleep(RECONNECT_INTERVAL)
+
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def start_listener(app: Flask) -> None:
+    """
+    Starts listening for `network_tags` changes in background thread
+    """
+
+    threading.Thread(
+        target=listen_for_changes, args=(app,), name="invalidation", daemon=True
+    ).start()
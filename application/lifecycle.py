@@ -0,0 +1,196 @@
+import gc
+import threading
+import time
+
+from flask import Flask
+
+from application.index import network_index
+from application.invalidation import register_invalidator, start_listener
+from application.models import NetworkTag, db
+from application.utils import setup_cache
+
+
+def load_network_index() -> None:
+    """
+    Loads all networks from `network_tags` table to in-process index
+    """
+
+    network_index.load(
+        db.session.query(NetworkTag.binary_network_part, NetworkTag.tags).yield_per(
+            10000
+        )
+    )
+
+
+@register_invalidator
+def refresh_network_index(binary_parts: list) -> None:
+    """
+    Replaces changed network parts in the index (of current process),
+    reloads the whole index when all of them have been changed
+    """
+
+    if not network_index.loaded:
+        return
+
+    if binary_parts is None:
+        load_network_index()
+        return
+
+    network_index.update(
+        binary_parts,
+        [
+            (network_tag.binary_network_part, network_tag.tags)
+            for network_tag in NetworkTag._get_many_objects(binary_parts)
+        ],
+    )
+
+
+def preload(app: Flask) -> None:
+    """
+    Loads read-only lookup structures once in gunicorn master (`preload_app`),
+    before forking workers, so they share memory pages copy-on-write:
+    - index of all networks (if enabled in `PRELOAD_INDEX`)
+    - prefix lengths of stored networks
+    Loaded objects are moved to the permanent generation of garbage collector,
+    which would otherwise write to (and copy) their pages in each worker
+    The dataset generation of the index is recorded, so workers forked later
+    (respawned) reload the index if the data have been changed meanwhile
+    """
+
+    with app.app_context():
+        try:
+            if app.config["PRELOAD_INDEX"]:
+                app.worker_state["index_generation"] = (
+                    NetworkTag.get_dataset_generation()
+                )
+                load_network_index()
+                app.logger.info(f"{len(network_index)} networks loaded to index")
+
+            NetworkTag.get_prefix_lengths("v4")
+            NetworkTag.get_prefix_lengths("v6")
+
+        except Exception:
+            app.logger.error("Error in preloading lookup structures", exc_info=True)
+
+        # connections of the master must not be shared with workers
+        db.engine.dispose()
+
+    app.cache.close()
+    gc.freeze()
+
+
+def init_worker(app: Flask) -> None:
+    """
+    Prepares forked gunicorn worker: opens its own database and memcached
+    connections, drops the preloaded index if the data have been changed
+    since preloading and starts the worker (see `start_worker`)
+    """
+
+    setup_cache(app)
+    with app.app_context():
+        db.engine.dispose()
+
+        if network_index.loaded:
+            generation = NetworkTag.get_dataset_generation()
+            if generation != app.worker_state["index_generation"]:
+                # stale index is dropped, so it is loaded again during warm-up
+                network_index.networks = None
+
+    start_worker(app)
+
+
+def start_worker(app: Flask) -> None:
+    """
+    Starts listening for `network_tags` changes (if enabled in
+    `CACHE_INVALIDATION_LISTENER`) and warms up the worker
+    Only the first call for the app in a process has effect
+    """
+
+    with app.worker_lock:
+        if app.worker_state["started"]:
+            return
+        app.worker_state["started"] = True
+
+    if app.config["CACHE_INVALIDATION_LISTENER"]:
+        start_listener(app)
+
+    if not warm_up(app):
+        threading.Thread(
+            target=retry_warm_up, args=(app,), name="warm-up", daemon=True
+        ).start()
+
+
+def retry_warm_up(app: Flask) -> None:
+    """
+    Retries failed warm-up of the worker in background until it succeeds
+    """
+
+    while True:
+        time.sleep(5)
+        if warm_up(app):
+            return
+
+
+def warm_up(app: Flask) -> bool:
+    """
+    Loads index (if enabled in `PRELOAD_INDEX` and not preloaded) or fills in
+    cache with the data from `network_tags` table
+    Returns True if warm-up has succeeded
+    """
+
+    with app.app_context():
+        try:
+            if app.config["PRELOAD_INDEX"] and not network_index.loaded:
+                load_network_index()
+
+            # lookups are served from index, so cache is warmed up only without it
+            if not network_index.loaded:
+                NetworkTag.fill_in_cache(100)
+                app.logger.info("Data from `network_tags` has been initially cached")
+
+            app.worker_state["warmed_up"] = True
+
+        except Exception:
+            app.logger.error("Error during initial caching data", exc_info=True)
+
+    return app.worker_state["warmed_up"]
+
+
+def setup_worker_state(app: Flask) -> None:
+    """
+    Initiates state of the worker (see `start_worker`)
+    """
+
+    app.worker_lock = threading.Lock()
+    app.worker_state = {"started": False, "warmed_up": False, "index_generation": None}
+
+
+def get_readiness(app: Flask) -> dict:
+    """
+    Returns readiness of current worker to handle requests:
+    - index - `ready`, `loading` or `disabled` (when `PRELOAD_INDEX` is off)
+    - cache - `ready`, `warming up` or `degraded` (memcached not responding,
+              lookups are served from index or database)
+    Worker with degraded cache is still ready
+    """
+
+    if not app.config["PRELOAD_INDEX"]:
+        index = "disabled"
+    else:
+        index = "ready" if network_index.loaded else "loading"
+
+    try:
+        cache_available = bool(app.cache.version())
+    except Exception:
+        cache_available = False
+
+    if not app.worker_state["warmed_up"]:
+        cache = "warming up"
+    else:
+        cache = "ready" if cache_available else "degraded"
+
+    return {
+        "ready": index in ("ready", "disabled") and app.worker_state["warmed_up"],
+        "index": index,
+        "cache": cache,
+    }
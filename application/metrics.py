@@ -0,0 +1,94 @@
+import os
+import time
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "network_tags_request_latency_seconds",
+    "Latency of HTTP requests",
+    ["endpoint"],
+)
+CACHE_LOOKUPS = Counter(
+    "network_tags_cache_lookups_total",
+    "Lookups of IP address network parts in cache (hit, partial, miss)",
+    ["result"],
+)
+CACHE_TIER_HITS = Counter(
+    "network_tags_cache_tier_hits_total",
+    "Network parts found in cache tiers (local, memcached)",
+    ["tier"],
+)
+CACHE_ADMISSIONS = Counter(
+    "network_tags_cache_admissions_total",
+    "Network parts offered to cache tiers (local, memcached) "
+    "by admission result (admitted, rejected)",
+    ["tier", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "network_tags_cache_evictions_total",
+    "Network parts evicted from in-process cache tier by admitted ones",
+)
+DB_QUERY_LATENCY = Histogram(
+    "network_tags_db_query_seconds",
+    "Latency of queries for network parts not found in cache",
+)
+PREFIXES_FETCHED = Histogram(
+    "network_tags_prefixes_fetched",
+    "Number of network parts fetched from database per lookup",
+    buckets=(0, 1, 2, 4, 8, 16, 24, 32, 64, 129),
+)
+WARMUP_RECORDS = Gauge(
+    "network_tags_warmup_cached_records",
+    "Number of records cached during warm-up",
+    multiprocess_mode="livemax",
+)
+WARMUP_COMPLETE = Gauge(
+    "network_tags_warmup_complete",
+    "1 if warm-up of cache has been finished",
+    multiprocess_mode="livemin",
+)
+
+
+def setup_metrics(app: Flask) -> None:
+    """
+    Initiates measuring HTTP requests latency for given Flask app
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+
+    @app.after_request
+    def observe_request_latency(response):
+        start_time = g.pop("request_start_time", None)
+        if start_time is not None:
+            REQUEST_LATENCY.labels(request.endpoint or "unknown").observe(
+                time.perf_counter() - start_time
+            )
+
+        return response
+
+
+def metrics_response() -> Response:
+    """
+    Returns response with all metrics in Prometheus text format
+    Under gunicorn (env var `PROMETHEUS_MULTIPROC_DIR` set) metrics
+    of all workers are collected
+    """
+
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,16 +1,53 @@
 import json
+import time
 from itertools import chain
 
 from flask import current_app
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.sql import text
 
-from application.utils import convert_ipv4_to_binary
+from application.admission import get_cache_timeout
+from application.index import network_index
+from application.metrics import (
+    CACHE_ADMISSIONS,
+    CACHE_LOOKUPS,
+    CACHE_TIER_HITS,
+    DB_QUERY_LATENCY,
+    PREFIXES_FETCHED,
+    WARMUP_COMPLETE,
+    WARMUP_RECORDS,
+)
+from application.profiling import stage
+from application.utils import (
+    IPV6_KEY_PREFIX,
+    convert_ips_to_binary,
+    get_binary_parts,
+    get_prefix_length,
+)
 
 db = SQLAlchemy()
 migrate = Migrate()
 
+DATASET_GENERATION_KEY = "dataset-generation"
+PREFIX_LENGTHS_KEY = "prefix-lengths"
+# lock of computing prefix lengths from database by one of app processes
+PREFIX_LENGTHS_LOCK_KEY = "prefix-lengths-lock"
+PREFIX_LENGTHS_LOCK_TIMEOUT = 60
+EMPTY_TAGS = json.dumps([])
+
+# modes of ip lookups: tags of all covering networks or of the longest one
+MATCH_MODES = ("all", "longest")
+
+# prefix lengths of stored networks kept in process memory
+# (see `NetworkTag.get_prefix_lengths`)
+prefix_lengths = {"v4": [], "v6": [], "loaded": False, "refresh_time": 0}
+
+# "C" collation keeps the primary key indexes usable for prefix (LIKE) scans
+# IPv6 network parts are up to 128 bits long, with `IPV6_KEY_PREFIX`
+binary_network_part_type = db.String(131, collation="C").with_variant(
+    db.String(131), "sqlite"
+)
+
 
 class NetworkTag(db.Model):
     """
@@ -22,7 +59,7 @@ class NetworkTag(db.Model):
 
     __tablename__ = "network_tags"
 
-    binary_network_part = db.Column(db.String(32), primary_key=True)
+    binary_network_part = db.Column(binary_network_part_type, primary_key=True)
     tags = db.Column(db.Text, nullable=False)
 
     def __repr__(self):
@@ -30,45 +67,392 @@ class NetworkTag(db.Model):
 
     @staticmethod
     def _get_many_objects(binary_parts_list: list) -> list:
-        """ Helper function for obtaining several binary ip networks """
-
-        filter_expression = text(
-            " or ".join(
-                [
-                    f"binary_network_part = '{binary_part}'"
-                    for binary_part in binary_parts_list
-                ]
+        """Helper function for obtaining several binary ip networks"""
+
+        return NetworkTag.query.filter(
+            NetworkTag.binary_network_part.in_(binary_parts_list)
+        ).all()
+
+    @staticmethod
+    def get_tags_for_ip(ip: str, match: str = "all", binary_ip: str = None) -> list:
+        """
+        Returns tags of networks covering given ip address (IPv4 or IPv6)
+        (see `NetworkTag.get_tags_for_ips`)
+        """
+
+        binary_ips = None if binary_ip is None else [binary_ip]
+        return NetworkTag.get_tags_for_ips([ip], match, binary_ips)[ip]
+
+    @staticmethod
+    def get_tags_for_ips(
+        ips: list, match: str = "all", binary_ips: list = None
+    ) -> dict:
+        """
+        Function checks network parts of ip addresses (IPv4 or IPv6) in preloaded
+        index, or (when it is not loaded) in cache
+        Only parts of prefix lengths existing in database are checked
+        Parts missing in cache are taken from database and set in cache
+        (also these not existing in database, with empty tags list)
+        With `match="longest"` only tags of the longest network covering
+        an address are returned, and parts shorter than the longest one
+        found in cache are not taken from database
+        Addresses already converted by `convert_ips_to_binary` can be given
+        in `binary_ips`, so they are not parsed again
+        Returns dict {ip: sorted list of tags}
+        """
+
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode {match}")
+
+        if binary_ips is None:
+            binary_ips = convert_ips_to_binary(ips)
+
+        parts_by_ip = {}
+        for ip, ip_binary in zip(ips, binary_ips):
+            ip_version = "v6" if ip_binary.startswith(IPV6_KEY_PREFIX) else "v4"
+            parts_by_ip[ip] = get_binary_parts(
+                ip_binary, NetworkTag.get_prefix_lengths(ip_version)
             )
-        )
 
-        return NetworkTag.query.filter(filter_expression).all()
+        # parts of all addresses are taken in one roundtrip, without duplicates
+        all_parts = list(dict.fromkeys(chain.from_iterable(parts_by_ip.values())))
+
+        if network_index.loaded:
+            # preloaded index holds all networks, so it replaces cache and database
+            with stage("index_get"):
+                tags_dict = network_index.get_many(all_parts)
+        else:
+            tags_dict = NetworkTag._get_cached_tags(all_parts, parts_by_ip, match)
+
+        with stage("decode"):
+            if match == "longest":
+                return {
+                    ip: NetworkTag._decode_longest_match(parts, tags_dict)
+                    for ip, parts in parts_by_ip.items()
+                }
+
+            return {
+                ip: sorted(
+                    set(
+                        chain.from_iterable(
+                            json.loads(tags_dict[part])
+                            for part in parts
+                            if tags_dict.get(part, EMPTY_TAGS) != EMPTY_TAGS
+                        )
+                    )
+                )
+                for ip, parts in parts_by_ip.items()
+            }
 
     @staticmethod
-    def get_tags_for_ip(ip: str) -> str:
+    def _get_cached_tags(all_parts: list, parts_by_ip: dict, match: str) -> dict:
         """
-        Function checks an ip addres in cache and returning it if exists
-        Otherwise returns data from database and set the result in cache
-        Returning data are deserialized
+        Returns dict {binary network part: tags} of given parts taken from cache,
+        and from database for parts missing in cache (setting them in cache)
         """
 
-        ip_binary = convert_ipv4_to_binary(ip)
-        ip_binary_parts = [ip_binary[: index + 1] for index in range(32)]
+        for part in all_parts:
+            current_app.frequency_sketch.increment(part)
+
+        with stage("cache_get"):
+            tags_dict = current_app.local_cache.get_many(all_parts)
+            CACHE_TIER_HITS.labels("local").inc(len(tags_dict))
+
+            remote_parts = [part for part in all_parts if part not in tags_dict]
+            if remote_parts:
+                remote_tags_dict = current_app.cache.get_many(remote_parts)
+                CACHE_TIER_HITS.labels("memcached").inc(len(remote_tags_dict))
+
+                current_app.local_cache.set_many(remote_tags_dict)
+                tags_dict.update(remote_tags_dict)
+
+        if match == "longest":
+            missing_parts = list(
+                dict.fromkeys(
+                    chain.from_iterable(
+                        NetworkTag._get_longest_match_candidates(parts, tags_dict)
+                        for parts in parts_by_ip.values()
+                    )
+                )
+            )
+        else:
+            missing_parts = [part for part in all_parts if part not in tags_dict]
+
+        if not missing_parts:
+            CACHE_LOOKUPS.labels("hit").inc()
+        elif tags_dict:
+            CACHE_LOOKUPS.labels("partial").inc()
+        else:
+            CACHE_LOOKUPS.labels("miss").inc()
 
-        tags_dict = current_app.cache.get_many(ip_binary_parts)
+        PREFIXES_FETCHED.observe(len(missing_parts))
 
-        if not tags_dict:
-            raw_objects = NetworkTag._get_many_objects(ip_binary_parts)
-            tags_dict = dict(
+        if missing_parts:
+            with DB_QUERY_LATENCY.time(), stage("db_query"):
+                raw_objects = NetworkTag._get_many_objects(missing_parts)
+
+            db_tags_dict = dict(
                 map(lambda x: (x.binary_network_part, x.tags), raw_objects)
             )
 
-            current_app.cache.set_many(
-                tags_dict, expire=current_app.config["CACHE_DEFAULT_TIMEOUT"]
+            # network parts absent in database are cached with empty tags
+            # list, so the next lookups of the ip are served from cache only
+            fetched_tags_dict = {
+                part: db_tags_dict.get(part, EMPTY_TAGS) for part in missing_parts
+            }
+            with stage("cache_set"):
+                NetworkTag._set_many_admitted(fetched_tags_dict)
+
+            tags_dict.update(db_tags_dict)
+
+        return tags_dict
+
+    @staticmethod
+    def _set_many_admitted(tags_dict: dict) -> None:
+        """
+        Sets in cache (in-process and memcached) network parts accessed
+        recently at least `CACHE_ADMISSION_THRESHOLD` times, so one-off lookups
+        (e.g. of scanners) do not evict frequent ones
+        Frequent parts are set in memcached with longer expiration time
+        """
+
+        admitted = {}
+        values_by_timeout = {}
+        for part, tags in tags_dict.items():
+            frequency = current_app.frequency_sketch.frequency(part)
+            if frequency >= current_app.config["CACHE_ADMISSION_THRESHOLD"]:
+                admitted[part] = tags
+                timeout = get_cache_timeout(frequency, current_app.config)
+                values_by_timeout.setdefault(timeout, {})[part] = tags
+
+        CACHE_ADMISSIONS.labels("memcached", "admitted").inc(len(admitted))
+        CACHE_ADMISSIONS.labels("memcached", "rejected").inc(
+            len(tags_dict) - len(admitted)
+        )
+
+        current_app.local_cache.set_many(admitted)
+        for timeout, values in values_by_timeout.items():
+            current_app.cache.set_many(values, expire=timeout)
+
+    @staticmethod
+    def _get_longest_match_candidates(binary_parts: list, tags_dict: dict) -> list:
+        """
+        Returns network parts (sorted by length) which have to be taken
+        from database to find the longest network among given parts:
+        parts missing in cache longer than the longest one found in cache
+        """
+
+        candidates = []
+        for part in reversed(binary_parts):
+            tags = tags_dict.get(part)
+            if tags is None:
+                candidates.append(part)
+            elif tags != EMPTY_TAGS:
+                break
+
+        return candidates[::-1]
+
+    @staticmethod
+    def _decode_longest_match(binary_parts: list, tags_dict: dict) -> list:
+        """
+        Returns deserialized tags of the longest of given network parts
+        existing in database
+        """
+
+        for part in reversed(binary_parts):
+            tags = tags_dict.get(part, EMPTY_TAGS)
+            if tags != EMPTY_TAGS:
+                return sorted(json.loads(tags))
+
+        return []
+
+    @staticmethod
+    def get_prefix_lengths(ip_version: str) -> list:
+        """
+        Returns sorted list of prefix lengths of networks of given
+        IP version (`v4` or `v6`) existing in database
+        Lengths are kept in process memory and refreshed every
+        `PREFIX_LENGTHS_REFRESH_INTERVAL` seconds from cache, or from
+        database when they are missing in cache (they expire from cache
+        after `CACHE_DEFAULT_TIMEOUT`, so networks added without
+        invalidation are found eventually)
+        Lengths missing in cache are computed by one process at once,
+        others use the lengths they know meanwhile
+        """
+
+        if time.monotonic() >= prefix_lengths["refresh_time"]:
+            lengths = current_app.cache.get(PREFIX_LENGTHS_KEY)
+
+            if lengths is None:
+                locked = NetworkTag._lock_prefix_lengths()
+                if not locked and prefix_lengths["loaded"]:
+                    prefix_lengths["refresh_time"] = time.monotonic() + 1
+                    return prefix_lengths[ip_version]
+
+                lengths = NetworkTag._query_prefix_lengths()
+                current_app.cache.set(
+                    PREFIX_LENGTHS_KEY,
+                    lengths,
+                    expire=current_app.config["CACHE_DEFAULT_TIMEOUT"],
+                )
+                if locked:
+                    current_app.cache.delete(PREFIX_LENGTHS_LOCK_KEY)
+
+            prefix_lengths.update(
+                lengths,
+                loaded=True,
+                refresh_time=time.monotonic()
+                + current_app.config["PREFIX_LENGTHS_REFRESH_INTERVAL"],
+            )
+
+        return prefix_lengths[ip_version]
+
+    @staticmethod
+    def _lock_prefix_lengths() -> bool:
+        """
+        Helper function locking computing of prefix lengths in cache
+        Returns True if the lock has been acquired (or cache is not available)
+        """
+
+        try:
+            return current_app.cache.add(
+                PREFIX_LENGTHS_LOCK_KEY,
+                1,
+                expire=PREFIX_LENGTHS_LOCK_TIMEOUT,
+                noreply=False,
+            )
+
+        except Exception:
+            return True
+
+    @staticmethod
+    def _query_prefix_lengths() -> dict:
+        """Helper function for obtaining prefix lengths existing in database"""
+
+        query = db.session.query(
+            db.func.length(NetworkTag.binary_network_part),
+            NetworkTag.binary_network_part.startswith(IPV6_KEY_PREFIX),
+        ).distinct()
+
+        lengths = {"v4": set(), "v6": set()}
+        for length, is_ipv6 in query:
+            if is_ipv6:
+                lengths["v6"].add(length - len(IPV6_KEY_PREFIX))
+            else:
+                lengths["v4"].add(length)
+
+        return {ip_version: sorted(lengths[ip_version]) for ip_version in lengths}
+
+    @staticmethod
+    def add_prefix_lengths(binary_parts: list) -> None:
+        """
+        Adds prefix lengths of given binary network parts to the known ones
+        Lengths of removed networks are kept (they only add cache lookups)
+        """
+
+        lengths = current_app.cache.get(PREFIX_LENGTHS_KEY)
+        if lengths is None:
+            prefix_lengths["refresh_time"] = 0
+            return
+
+        for binary_part in binary_parts:
+            ip_version, length = get_prefix_length(binary_part)
+            if length not in lengths[ip_version]:
+                lengths[ip_version] = sorted(lengths[ip_version] + [length])
+
+        current_app.cache.set(
+            PREFIX_LENGTHS_KEY,
+            lengths,
+            expire=current_app.config["CACHE_DEFAULT_TIMEOUT"],
+        )
+        prefix_lengths.update(lengths)
+
+    @staticmethod
+    def reset_prefix_lengths() -> None:
+        """
+        Removes known prefix lengths, they are computed again on next lookup
+        """
+
+        current_app.cache.delete(PREFIX_LENGTHS_KEY)
+        prefix_lengths["refresh_time"] = 0
+
+    @staticmethod
+    def get_networks_for_range(binary_part: str, after: str = None, limit: int = None):
+        """
+        Returns query of networks contained in or covering the network
+        with given binary network part, ordered by `binary_network_part`
+        Covering networks are always sorted before contained ones, so the
+        results can be paginated with `after` (last seen binary network part)
+        """
+
+        ip_version, length = get_prefix_length(binary_part)
+        covering_parts = get_binary_parts(binary_part, range(length))
+
+        query = NetworkTag.query.filter(
+            db.or_(
+                NetworkTag.binary_network_part.in_(covering_parts),
+                NetworkTag.binary_network_part.startswith(binary_part),
+            )
+        )
+
+        if ip_version == "v4" and not binary_part:
+            query = query.filter(
+                ~NetworkTag.binary_network_part.startswith(IPV6_KEY_PREFIX)
+            )
+
+        if after is not None:
+            query = query.filter(NetworkTag.binary_network_part > after)
+
+        return query.order_by(NetworkTag.binary_network_part).limit(limit)
+
+    @staticmethod
+    def get_dataset_generation() -> int:
+        """
+        Returns the generation of `network_tags` data kept in cache.
+        It changes with every change of the data (see `bump_dataset_generation`)
+        When the generation is lost from cache (or expired,
+        see `_get_dataset_generation_timeout`), the new one (current time)
+        is started. Returns None when cache is not available
+        """
+
+        generation = current_app.cache.get(DATASET_GENERATION_KEY)
+
+        if generation is None:
+            current_app.cache.add(
+                DATASET_GENERATION_KEY,
+                int(time.time()),
+                expire=NetworkTag._get_dataset_generation_timeout(),
             )
+            generation = current_app.cache.get(DATASET_GENERATION_KEY)
+
+        return generation
+
+    @staticmethod
+    def _get_dataset_generation_timeout() -> int:
+        """
+        Helper function returning expiration time of the dataset generation
+        Without invalidation listener changes of the data are not notified,
+        cached networks are refreshed when they expire, so the generation
+        (and ETags) expires after `CACHE_DEFAULT_TIMEOUT` as well
+        """
 
-        list_of_tags_list = [json.loads(el) for el in tags_dict.values()]
+        if current_app.config["CACHE_INVALIDATION_LISTENER"]:
+            return 0
 
-        return sorted(set(chain.from_iterable(list_of_tags_list)))
+        return current_app.config["CACHE_DEFAULT_TIMEOUT"]
+
+    @staticmethod
+    def bump_dataset_generation() -> None:
+        """
+        Starts the new generation of `network_tags` data
+        """
+
+        if current_app.cache.incr(DATASET_GENERATION_KEY, 1) is None:
+            current_app.cache.set(
+                DATASET_GENERATION_KEY,
+                int(time.time()),
+                expire=NetworkTag._get_dataset_generation_timeout(),
+            )
 
     @staticmethod
     def fill_in_cache(records_limit: int) -> None:
@@ -84,3 +468,37 @@ class NetworkTag(db.Model):
             )
 
             current_app.cache.set_many(data)
+
+        WARMUP_RECORDS.set(len(all_network_tag_objects))
+        WARMUP_COMPLETE.set(1)
+
+
+class TagNetwork(db.Model):
+    """
+    TagNetwork model (inverted index of `network_tags`) with two fields:
+    tag - a tag linked to IP network address
+    binary_network_part - binary representation of network
+                          part of IP network address
+    """
+
+    __tablename__ = "tag_networks"
+
+    tag = db.Column(db.Text, primary_key=True)
+    binary_network_part = db.Column(binary_network_part_type, primary_key=True)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.tag} {self.binary_network_part}>"
+
+    @staticmethod
+    def get_networks_for_tag(tag: str) -> list:
+        """
+        Returns sorted list of binary network parts linked with given tag
+        """
+
+        query = (
+            db.session.query(TagNetwork.binary_network_part)
+            .filter(TagNetwork.tag == tag)
+            .order_by(TagNetwork.binary_network_part)
+        )
+
+        return [binary_part for (binary_part,) in query]
@@ -0,0 +1,96 @@
+import cProfile
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import Flask, current_app, g, has_app_context, request
+
+PROFILE_HEADER = "X-Profile"
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Measures time of given stage of current request processing
+    (only if profiling is enabled, otherwise does nothing)
+    """
+
+    stages = g.get("stages") if has_app_context() else None
+    if stages is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0) + time.perf_counter() - start_time
+
+
+def setup_profiling(app: Flask) -> None:
+    """
+    Initiates profiling of requests for given Flask app, if enabled
+    in `PROFILING_ENABLED` setting:
+    - requests with `X-Profile` header or sampled with `PROFILE_SAMPLE_RATE`
+      are profiled with cProfile, profiles are saved in `PROFILE_DIR`
+    - requests slower than `SLOW_REQUEST_THRESHOLD_MS` are logged
+      with time of each stage
+    """
+
+    if not app.config["PROFILING_ENABLED"]:
+        return
+
+    app.config["PROFILE_DIR"].mkdir(parents=True, exist_ok=True)
+
+    @app.before_request
+    def start_profiling():
+        g.stages = {}
+        g.profile_start_time = time.perf_counter()
+
+        if (
+            PROFILE_HEADER in request.headers
+            or random.random() < current_app.config["PROFILE_SAMPLE_RATE"]
+        ):
+            try:
+                g.profiler = cProfile.Profile()
+                g.profiler.enable()
+
+            except ValueError:
+                # other request in this process is being profiled
+                g.profiler = None
+
+    @app.after_request
+    def finish_profiling(response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            save_profile(profiler)
+
+        request_time = (time.perf_counter() - g.profile_start_time) * 1e3
+        if request_time > current_app.config["SLOW_REQUEST_THRESHOLD_MS"]:
+            stages = " ".join(
+                f"{name}={stage_time * 1e3:.1f}ms"
+                for name, stage_time in g.stages.items()
+            )
+            current_app.logger.warning(
+                f"Slow request {request.path} ({request_time:.1f}ms): {stages}"
+            )
+
+        return response
+
+
+def save_profile(profiler: cProfile.Profile) -> None:
+    """
+    Saves profile of current request in `PROFILE_DIR`
+    (to be read with `pstats` or e.g. snakeviz)
+    """
+
+    timestamp = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+    file_name = f"{timestamp}-{request.endpoint or 'unknown'}.prof"
+
+    try:
+        profiler.dump_stats(current_app.config["PROFILE_DIR"] / file_name)
+
+    except Exception:
+        current_app.logger.error("Error in saving profile", exc_info=True)
@@ -1,19 +1,47 @@
+import ipaddress
 import json
 import logging
 import re
 from itertools import groupby
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from socket import AF_INET, inet_pton
 
 from flask import Flask
 from pymemcache.client.base import Client
 from pymemcache.serde import PickleSerde
 
+from application.admission import FrequencySketch, LocalCache
+
+# format of IPv4 addresses (implemented by `parse_ipv4`)
 IPV4_RE = re.compile(
     r"^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}"
     r"([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$"
 )
 
+# binary network parts of IPv6 networks are prefixed to distinguish them
+# from IPv4 ones (like `v6:0010000000000001` for `2001::/16`)
+IPV6_KEY_PREFIX = "v6:"
+
+
+def parse_ipv4(ip: str) -> int:
+    """
+    Validates given IP address and returns it as 32-bit integer in one pass
+    Accepted are the same addresses as by `IPV4_RE` (four decimal
+    octets 0-255 without leading zeros, optionally followed by newline)
+
+    Otherwise returns None
+    """
+
+    if ip.endswith("\n"):
+        # `$` of `IPV4_RE` matches also before the trailing newline
+        ip = ip[:-1]
+
+    try:
+        return int.from_bytes(inet_pton(AF_INET, ip), "big")
+    except (OSError, ValueError):
+        return None
+
 
 def is_valid_ipv4(ip: str) -> bool:
     """
@@ -22,23 +50,232 @@ def is_valid_ipv4(ip: str) -> bool:
     Otherwise returns False
     """
 
-    return bool(IPV4_RE.match(ip))
+    return parse_ipv4(ip) is not None
 
 
 def convert_ipv4_to_binary(ip: str) -> str:
-
     """
     If given IP address has IPv4 format, converts it to 32-bit string
 
     Otherwise returns empty string
     """
 
+    address = parse_ipv4(ip)
+    return "" if address is None else f"{address:032b}"
+
+
+def is_valid_ipv6(ip: str) -> bool:
+    """
+    Returns True if given IP address has IPv6 format (without zone index)
+
+    Otherwise returns False
+    """
+
+    try:
+        ipaddress.IPv6Address(ip)
+    except ValueError:
+        return False
+
+    return "%" not in ip
+
+
+def convert_ipv6_to_binary(ip: str) -> str:
+    """
+    If given IP address has IPv6 format, converts it to 128-bit string
+    prefixed with `IPV6_KEY_PREFIX`
+
+    Otherwise returns empty string
+    """
+
+    if "%" in ip:
+        return ""
+
+    try:
+        address = ipaddress.IPv6Address(ip)
+    except ValueError:
+        return ""
+
+    return f"{IPV6_KEY_PREFIX}{int(address):0128b}"
+
+
+def is_valid_ip(ip: str) -> bool:
+    """
+    Returns True if given IP address has IPv4 or IPv6 format
+
+    Otherwise returns False
+    """
+
+    return is_valid_ipv4(ip) or is_valid_ipv6(ip)
+
+
+def convert_ip_to_binary(ip: str) -> str:
+    """
+    Converts given IPv4 or IPv6 address to binary string
+    (see `convert_ipv4_to_binary` and `convert_ipv6_to_binary`)
+    """
+
+    return convert_ipv4_to_binary(ip) or convert_ipv6_to_binary(ip)
+
+
+def convert_ips_to_binary(ips: list) -> list:
+    """
+    Converts given list of IPv4 or IPv6 addresses to list of binary strings
+    (empty strings for invalid addresses), see `convert_ip_to_binary`
+    """
+
+    binary_ips = []
+    for ip in ips:
+        address = parse_ipv4(ip)
+        binary_ips.append(
+            convert_ipv6_to_binary(ip) if address is None else f"{address:032b}"
+        )
+
+    return binary_ips
+
+
+def get_binary_parts(ip_binary: str, prefix_lengths: list) -> list:
+    """
+    Returns binary network parts (prefixes) of given lengths
+    of binary IPv4 or IPv6 address
+    """
+
+    offset = len(IPV6_KEY_PREFIX) if ip_binary.startswith(IPV6_KEY_PREFIX) else 0
+
+    return [ip_binary[: offset + length] for length in prefix_lengths]
+
+
+def is_valid_net_digits(net_digits: str, max_digits: int) -> bool:
+    """
+    Returns True if given network prefix length is a number
+    from 0 to `max_digits` (without leading zeros)
+    """
+
     return (
-        is_valid_ipv4(ip)
-        and "".join(format(int(x), "08b") for x in ip.split("."))
-        or ""
+        net_digits.isdigit()
+        and net_digits == str(int(net_digits))
+        and int(net_digits) <= max_digits
+    )
+
+
+def is_valid_ipv4_network(network: str) -> bool:
+    """
+    Returns True if given IP network address has IPv4 CIDR format
+    (like `10.0.0.0/8`)
+
+    Otherwise returns False
+    """
+
+    address, _, net_digits = network.partition("/")
+
+    return is_valid_ipv4(address) and is_valid_net_digits(net_digits, 32)
+
+
+def convert_ipv4_network_to_binary(network: str) -> str:
+    """
+    Converts given IPv4 network address (like `10.0.0.0/8`) to binary
+    representation of its network part (like `00001010`)
+    """
+
+    net_address, net_digits = network.split("/")
+
+    return convert_ipv4_to_binary(net_address)[: int(net_digits)]
+
+
+def convert_binary_to_ipv4_network(binary_network_part: str) -> str:
+    """
+    Converts binary representation of a network part (like `00001010`)
+    back to IPv4 network address (like `10.0.0.0/8`)
+    """
+
+    net_address_binary = binary_network_part.ljust(32, "0")
+    net_address = ".".join(
+        str(int(net_address_binary[index : index + 8], 2)) for index in range(0, 32, 8)
     )
 
+    return f"{net_address}/{len(binary_network_part)}"
+
+
+def is_valid_ipv6_network(network: str) -> bool:
+    """
+    Returns True if given IP network address has IPv6 CIDR format
+    (like `2001:db8::/32`)
+
+    Otherwise returns False
+    """
+
+    address, _, net_digits = network.partition("/")
+
+    return is_valid_ipv6(address) and is_valid_net_digits(net_digits, 128)
+
+
+def convert_ipv6_network_to_binary(network: str) -> str:
+    """
+    Converts given IPv6 network address (like `2001::/16`) to binary
+    representation of its network part (like `v6:0010000000000001`)
+    """
+
+    net_address, net_digits = network.split("/")
+
+    return convert_ipv6_to_binary(net_address)[: len(IPV6_KEY_PREFIX) + int(net_digits)]
+
+
+def convert_binary_to_ipv6_network(binary_network_part: str) -> str:
+    """
+    Converts binary representation of a network part (like `v6:0010000000000001`)
+    back to IPv6 network address (like `2001::/16`)
+    """
+
+    network_bits = binary_network_part[len(IPV6_KEY_PREFIX) :]
+    net_address = ipaddress.IPv6Address(int(network_bits.ljust(128, "0"), 2))
+
+    return f"{net_address}/{len(network_bits)}"
+
+
+def is_valid_ip_network(network: str) -> bool:
+    """
+    Returns True if given IP network address has IPv4 or IPv6 CIDR format
+
+    Otherwise returns False
+    """
+
+    return is_valid_ipv4_network(network) or is_valid_ipv6_network(network)
+
+
+def convert_ip_network_to_binary(network: str) -> str:
+    """
+    Converts given IPv4 or IPv6 network address to binary
+    representation of its network part
+    """
+
+    if ":" in network:
+        return convert_ipv6_network_to_binary(network)
+
+    return convert_ipv4_network_to_binary(network)
+
+
+def convert_binary_to_ip_network(binary_network_part: str) -> str:
+    """
+    Converts binary representation of a network part back to
+    IPv4 or IPv6 network address
+    """
+
+    if binary_network_part.startswith(IPV6_KEY_PREFIX):
+        return convert_binary_to_ipv6_network(binary_network_part)
+
+    return convert_binary_to_ipv4_network(binary_network_part)
+
+
+def get_prefix_length(binary_network_part: str) -> tuple:
+    """
+    Returns IP version (`v4` or `v6`) and prefix length
+    of given binary network part
+    """
+
+    if binary_network_part.startswith(IPV6_KEY_PREFIX):
+        return "v6", len(binary_network_part) - len(IPV6_KEY_PREFIX)
+
+    return "v4", len(binary_network_part)
+
 
 def load_json_file(path: Path) -> list:
     """
@@ -57,7 +294,8 @@ def prepare_data_to_db(path: Path) -> list:
     Prepares data for loading to database. Returns a list of dicts with keys:
     - `binary_network_part`: an unique identifier of an ip network address
                              (a binary representation of a network part of an
-                             IP network address, like `00001010` for `10.0.0.0/8`)
+                             IP network address, like `00001010` for `10.0.0.0/8`
+                             or `v6:0010000000000001` for `2001::/16`)
     - `tags`: json serialized sorted list of unique tags connected
               with IP network address (`binary_network_part`)
     """
@@ -69,10 +307,7 @@ def prepare_data_to_db(path: Path) -> list:
 
     # adding new attribute `binary_network_part`
     for el in data:
-        net_address, net_digits = el["ip_network"].split("/")
-        net_digits = int(net_digits)
-        net_address_binary = convert_ipv4_to_binary(net_address)
-        el["binary_network_part"] = net_address_binary[:net_digits]
+        el["binary_network_part"] = convert_ip_network_to_binary(el["ip_network"])
 
     # grouping `tags` in data by `binary_network_part` attribute
     # tags in lists are unique, sorted and serialized
@@ -87,6 +322,21 @@ def prepare_data_to_db(path: Path) -> list:
     return prepared_data
 
 
+def prepare_tag_networks_to_db(prepared_data: list) -> list:
+    """
+    Prepares inverted index (tag -> networks) for loading to database from
+    the data returned by `prepare_data_to_db`. Returns a list of dicts with keys:
+    - `tag`: a tag connected with IP network address
+    - `binary_network_part`: an unique identifier of an ip network address
+    """
+
+    return [
+        {"tag": tag, "binary_network_part": el["binary_network_part"]}
+        for el in prepared_data
+        for tag in json.loads(el["tags"])
+    ]
+
+
 def setup_logging(app: Flask) -> None:
     """
     Initiates logging for given Flask app
@@ -111,9 +361,17 @@ def setup_logging(app: Flask) -> None:
 
 def setup_cache(app: Flask) -> None:
     """
-    Initiates memcached caching
+    Initiates memcached caching and in-process cache tier,
+    with frequency sketch used for admission to both of them
     """
 
+    app.frequency_sketch = FrequencySketch(app.config["FREQUENCY_SKETCH_WIDTH"])
+    app.local_cache = LocalCache(
+        app.config["LOCAL_CACHE_SIZE"],
+        app.config["LOCAL_CACHE_TIMEOUT"],
+        app.frequency_sketch,
+    )
+
     try:
         app.cache = Client(
             app.config["MEMCACHED_SERVER"],
@@ -0,0 +1,266 @@
+"""
+Micro-benchmarks of the lookup engine, running on in-memory cache
+and database (sqlite) with synthetic datasets
+
+    ./manage.py benchmark --sizes 1000,100000 --output bench_results.json
+"""
+
+import ipaddress
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import click
+
+from application import create_app
+from application.datagen import generate_records, write_records
+from application.endpoints.responses import make_ip_etag
+from application.models import NetworkTag, db
+from application.utils import (
+    IPV4_RE,
+    convert_ip_to_binary,
+    convert_ips_to_binary,
+    convert_ipv4_to_binary,
+    is_valid_ip,
+    prepare_data_to_db,
+    setup_cache,
+)
+
+from .datasets import generate_ips
+from .fakes import FakeCache
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """
+    Registers benchmark setup function under given name
+    Setup function gets the dataset and returns a function to measure
+    and a list of arguments, the function is called with each of them
+    """
+
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+@benchmark("convert_ipv4_to_binary")
+def bench_convert_ipv4_to_binary(dataset):
+    return convert_ipv4_to_binary, dataset.ips
+
+
+def regex_convert_ipv4_to_binary(ip: str) -> str:
+    """Former conversion (regex validation, octets formatted one by one)"""
+
+    return (
+        bool(IPV4_RE.match(ip))
+        and "".join(format(int(x), "08b") for x in ip.split("."))
+        or ""
+    )
+
+
+@benchmark("convert_ipv4_to_binary_regex")
+def bench_convert_ipv4_to_binary_regex(dataset):
+    return regex_convert_ipv4_to_binary, dataset.ips
+
+
+@benchmark("validate_and_convert_ip_regex")
+def bench_validate_and_convert_ip_regex(dataset):
+    # former request path: validation in endpoint and conversion in model,
+    # both matching `IPV4_RE`
+    def validate_and_convert(ip):
+        return bool(IPV4_RE.match(ip)) and regex_convert_ipv4_to_binary(ip)
+
+    return validate_and_convert, dataset.ips
+
+
+@benchmark("validate_and_convert_ip")
+def bench_validate_and_convert_ip(dataset):
+    def validate_and_convert(ip):
+        return is_valid_ip(ip) and convert_ip_to_binary(ip)
+
+    return validate_and_convert, dataset.ips
+
+
+@benchmark("request_key_and_etag_ipaddress")
+def bench_request_key_and_etag_ipaddress(dataset):
+    # former request path: validation, ETag of address parsed by `ipaddress`
+    # and conversion in model, each parsing the address again
+    def request_key_and_etag(ip):
+        if not is_valid_ip(ip):
+            return None
+
+        generation = NetworkTag.get_dataset_generation()
+        etag = f"{generation}-{ipaddress.ip_address(ip).packed.hex()}"
+        return convert_ip_to_binary(ip), etag
+
+    return request_key_and_etag, dataset.ips
+
+
+@benchmark("request_key_and_etag")
+def bench_request_key_and_etag(dataset):
+    def request_key_and_etag(ip):
+        binary_ip = convert_ip_to_binary(ip)
+        return binary_ip and (binary_ip, make_ip_etag(binary_ip))
+
+    return request_key_and_etag, dataset.ips
+
+
+@benchmark("convert_ips_to_binary_100")
+def bench_convert_ips_to_binary(dataset):
+    chunks = [dataset.ips[i : i + 100] for i in range(0, len(dataset.ips), 100)]
+    return convert_ips_to_binary, chunks
+
+
+@benchmark("prepare_data_to_db")
+def bench_prepare_data_to_db(dataset):
+    return prepare_data_to_db, [dataset.path]
+
+
+def reset_caches(app) -> None:
+    """
+    Replaces memcached, in-process cache tier and frequency sketch
+    of the app with empty ones and forgets prefix lengths of the previous
+    dataset
+    """
+
+    setup_cache(app)
+    app.cache = FakeCache()
+    NetworkTag.reset_prefix_lengths()
+
+
+@benchmark("get_tags_for_ip_cold")
+def bench_get_tags_for_ip_cold(dataset):
+    reset_caches(dataset.app)
+    return NetworkTag.get_tags_for_ip, dataset.ips
+
+
+@benchmark("get_tags_for_ip_warm")
+def bench_get_tags_for_ip_warm(dataset):
+    reset_caches(dataset.app)
+
+    # network parts are admitted to cache after `CACHE_ADMISSION_THRESHOLD` accesses
+    for _ in range(dataset.app.config["CACHE_ADMISSION_THRESHOLD"]):
+        for ip in dataset.ips:
+            NetworkTag.get_tags_for_ip(ip)
+
+    return NetworkTag.get_tags_for_ip, dataset.ips
+
+
+def measure(func, args_list: list) -> dict:
+    """Calls `func` with each of arguments and returns timing statistics"""
+
+    timings = []
+    for arg in args_list:
+        start_time = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start_time)
+
+    timings.sort()
+    total_time = sum(timings)
+
+    return {
+        "ops": len(timings),
+        "ops_per_sec": len(timings) / total_time if total_time else None,
+        "p50_us": timings[int(len(timings) * 0.50)] * 1e6,
+        "p99_us": timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1e6,
+    }
+
+
+def measure_peak_memory(func, args_list: list) -> int:
+    """Calls `func` with each of arguments and returns peak of allocated memory"""
+
+    tracemalloc.start()
+    for arg in args_list:
+        func(arg)
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def load_dataset(app, size: int, lookups: int, seed: int, directory: Path):
+    """
+    Generates dataset of given size, saves it as json file
+    and loads it to the database
+    """
+
+    records = list(generate_records(size, seed))
+    path = directory / f"db{size}.json"
+    with open(path, "w") as file:
+        write_records(records, file)
+
+    db.drop_all()
+    db.create_all()
+    db.session.execute(NetworkTag.__table__.insert(), prepare_data_to_db(path))
+    db.session.commit()
+    reset_caches(app)
+
+    return SimpleNamespace(
+        app=app, size=size, path=path, ips=generate_ips(records, lookups, seed)
+    )
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+@click.command()
+@click.option("--sizes", default="1000,10000,100000", help="Dataset sizes")
+@click.option("--lookups", default=10000, help="Number of lookups per benchmark")
+@click.option("--seed", default=0, help="Seed of synthetic datasets")
+@click.option("--only", multiple=True, type=click.Choice(sorted(BENCHMARKS)))
+@click.option("--memory/--no-memory", default=True, help="Measure peak memory")
+@click.option("--output", default="bench_results.json", type=click.Path())
+def main(sizes, lookups, seed, only, memory, output):
+    """Runs lookup engine benchmarks and saves results to json file"""
+
+    app = create_app("benchmark")
+
+    results = []
+    with app.app_context(), tempfile.TemporaryDirectory() as directory:
+        for size in (int(size) for size in sizes.split(",")):
+            dataset = load_dataset(app, size, lookups, seed, Path(directory))
+
+            for name in only or BENCHMARKS:
+                result = {"benchmark": name, "size": size}
+                result.update(measure(*BENCHMARKS[name](dataset)))
+
+                if memory:
+                    result["peak_memory_bytes"] = measure_peak_memory(
+                        *BENCHMARKS[name](dataset)
+                    )
+
+                results.append(result)
+                click.echo(
+                    f"{name:<30} size={size:<10} "
+                    f"{result['ops_per_sec'] or 0:>12.1f} ops/s  "
+                    f"p50={result['p50_us']:.1f}us  p99={result['p99_us']:.1f}us"
+                )
+
+    report = {
+        "commit": get_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
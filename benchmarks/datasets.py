@@ -0,0 +1,32 @@
+import random
+
+from application.datagen import int_to_ipv4
+
+
+def generate_ips(records: list, count: int, seed: int = 0) -> list:
+    """
+    Returns list of `count` IPv4 addresses, half of them from IPv4 networks
+    of given records and half of them random
+    """
+
+    rand = random.Random(seed)
+    records = [el for el in records if ":" not in el["ip_network"]]
+
+    ips = []
+    for index in range(count):
+        if index % 2:
+            ips.append(int_to_ipv4(rand.getrandbits(32)))
+            continue
+
+        net_address, net_digits = rand.choice(records)["ip_network"].split("/")
+        address = ipv4_to_int(net_address) | rand.getrandbits(32 - int(net_digits))
+        ips.append(int_to_ipv4(address))
+
+    return ips
+
+
+def ipv4_to_int(ip: str) -> int:
+    """Converts IPv4 address to 32-bit integer"""
+
+    a, b, c, d = (int(x) for x in ip.split("."))
+    return a << 24 | b << 16 | c << 8 | d
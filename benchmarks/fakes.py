@@ -0,0 +1,52 @@
+class FakeCache:
+    """
+    In-memory replacement of pymemcache client (only methods used by app)
+    Expiration times are ignored
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        data = self.data
+        return {key: data[key] for key in keys if key in data}
+
+    def set(self, key, value, expire=0, noreply=None):
+        self.data[key] = value
+        return True
+
+    def set_many(self, values, expire=0, noreply=None):
+        self.data.update(values)
+        return []
+
+    def add(self, key, value, expire=0, noreply=None):
+        if key in self.data:
+            return False
+
+        self.data[key] = value
+        return True
+
+    def incr(self, key, value, noreply=False):
+        if key not in self.data:
+            return None
+
+        self.data[key] = int(self.data[key]) + value
+        return self.data[key]
+
+    def delete(self, key, noreply=None):
+        self.data.pop(key, None)
+        return True
+
+    def delete_many(self, keys, noreply=None):
+        for key in keys:
+            self.data.pop(key, None)
+        return True
+
+    def version(self):
+        return b"fake"
+
+    def close(self):
+        pass
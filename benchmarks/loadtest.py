@@ -0,0 +1,194 @@
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from urllib.parse import urlsplit
+
+from application.datagen import int_to_ipv4
+
+from .datasets import ipv4_to_int
+
+ENDPOINTS = {
+    "ip-tags": "/ip-tags/{}",
+    "ip-tags-report": "/ip-tags-report/{}",
+}
+
+
+class KnowledgeBase:
+    """
+    IPv4 networks from knowledge base json file, grouped by prefix length
+    for checking if an IP address is covered by any of them
+    (IPv6 networks are skipped, as load test addresses are IPv4 ones)
+    """
+
+    def __init__(self, path: str):
+        with open(path) as file:
+            data = json.load(file)
+
+        self.networks = []
+        self.networks_by_length = {}
+        for el in data:
+            net_address, net_digits = el["ip_network"].split("/")
+            if ":" in net_address:
+                continue
+
+            net_digits = int(net_digits)
+            network = ipv4_to_int(net_address) >> (32 - net_digits) << (32 - net_digits)
+
+            self.networks.append((network, net_digits))
+            self.networks_by_length.setdefault(net_digits, set()).add(
+                network >> (32 - net_digits)
+            )
+
+    def is_covered(self, address: int) -> bool:
+        return any(
+            address >> (32 - net_digits) in networks
+            for net_digits, networks in self.networks_by_length.items()
+        )
+
+    def random_covered(self, rand: random.Random) -> int:
+        if not self.networks:
+            raise ValueError("Knowledge base has no IPv4 networks")
+
+        network, net_digits = rand.choice(self.networks)
+        return network | rand.getrandbits(32 - net_digits)
+
+    def random_uncovered(self, rand: random.Random, attempts: int = 100) -> int:
+        for _ in range(attempts):
+            address = rand.getrandbits(32)
+            if not self.is_covered(address):
+                return address
+
+        return address
+
+
+def generate_ips(
+    knowledge_base: KnowledgeBase,
+    distribution: str,
+    count: int,
+    hot_set: int,
+    zipf_s: float,
+    seed: int,
+) -> list:
+    """
+    Returns list of `count` IP addresses drawn with given distribution:
+    - `uniform` - random addresses from the whole IPv4 space
+    - `zipf` - addresses from `hot_set` of covered addresses with Zipf
+               distribution of popularity (exponent `zipf_s`)
+    - `uncovered` - 90% of addresses not covered by any network
+                    from knowledge base, 10% covered
+    """
+
+    if count < 1:
+        raise ValueError(f"Number of addresses must be positive, got {count}")
+
+    rand = random.Random(seed)
+
+    if distribution == "uniform":
+        addresses = [rand.getrandbits(32) for _ in range(count)]
+
+    elif distribution == "zipf":
+        if hot_set < 1:
+            raise ValueError(f"Hot set size must be positive, got {hot_set}")
+
+        hot_addresses = [knowledge_base.random_covered(rand) for _ in range(hot_set)]
+        cum_weights = list(
+            accumulate(1 / rank**zipf_s for rank in range(1, hot_set + 1))
+        )
+        addresses = rand.choices(hot_addresses, cum_weights=cum_weights, k=count)
+
+    elif distribution == "uncovered":
+        addresses = [
+            (
+                knowledge_base.random_covered(rand)
+                if rand.random() < 0.1
+                else knowledge_base.random_uncovered(rand)
+            )
+            for _ in range(count)
+        ]
+
+    else:
+        raise ValueError(f"Unknown distribution {distribution}")
+
+    return [int_to_ipv4(address) for address in addresses]
+
+
+def percentile(latencies: list, value: float) -> float:
+    """
+    Returns `value` percentile (0-1) of sorted latencies in seconds,
+    in milliseconds
+    """
+
+    if not latencies:
+        raise ValueError("No latencies")
+
+    return latencies[min(int(len(latencies) * value), len(latencies) - 1)] * 1e3
+
+
+def run_loadtest(url: str, paths: list, concurrency: int, timeout: float) -> dict:
+    """
+    Sends GET requests for given paths to the service under `url`
+    from `concurrency` threads (with keep-alive connections)
+    Returns throughput, latency percentiles and errors statistics
+    """
+
+    if not paths:
+        raise ValueError("No paths to request")
+    if concurrency < 1:
+        raise ValueError(f"Concurrency must be positive, got {concurrency}")
+
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def get_connection() -> http.client.HTTPConnection:
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection(
+                parts.hostname, parts.port or 80, timeout=timeout
+            )
+        return local.connection
+
+    def send(path: str) -> tuple:
+        start_time = time.perf_counter()
+        try:
+            connection = get_connection()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+
+        except Exception as exc:
+            local.__dict__.pop("connection", None)
+            status = type(exc).__name__
+
+        return time.perf_counter() - start_time, status
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, paths))
+    total_time = time.perf_counter() - start_time
+
+    latencies = sorted(latency for latency, _ in results)
+    statuses = Counter(str(status) for _, status in results)
+    errors = sum(
+        count
+        for status, count in statuses.items()
+        if not status.isdigit() or int(status) >= 400
+    )
+
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "duration_s": total_time,
+        "throughput_rps": len(results) / total_time,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] * 1e3,
+        "errors": errors,
+        "error_rate": errors / len(results),
+        "statuses": dict(statuses),
+    }
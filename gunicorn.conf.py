@@ -0,0 +1,46 @@
+import os
+from pathlib import Path
+
+from prometheus_client import multiprocess
+
+bind = "0.0.0.0:8000"
+workers = 4
+
+# app and read-only lookup structures are loaded once in the master,
+# workers share them copy-on-write
+preload_app = True
+
+# metrics directory is needed already by the app preloaded in the master
+# (before `on_starting`)
+metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if metrics_dir:
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """
+    Cleaning up metrics files left by previous run, before spawning workers
+    (only once, the config file is executed again on reload)
+    """
+    if metrics_dir:
+        for path in Path(metrics_dir).glob("*.db"):
+            path.unlink(missing_ok=True)
+
+
+def when_ready(server):
+    """Loading lookup structures in the master, before forking workers"""
+    from application.lifecycle import preload
+
+    preload(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """Opening connections of the worker, warming it up"""
+    from application.lifecycle import init_worker
+
+    init_worker(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    """Removing live metrics of exited worker"""
+    multiprocess.mark_process_dead(worker.pid)
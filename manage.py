@@ -224,6 +224,102 @@ def test(filenames: str) -> None:
     subprocess.call(cmdline)
 
 
+@cli.command(context_settings={"ignore_unknown_options": True})
+@click.argument("options", nargs=-1, type=click.Path())
+def benchmark(options: str) -> None:
+    """Running lookup engine benchmarks on in-memory cache and database"""
+    # Options are passed to `python -m benchmarks`, see --help
+
+    os.environ["APPLICATION_CONFIG"] = "testing"
+    set_app_config(os.environ.get("APPLICATION_CONFIG"))
+    manage_logger.info(RUNNING_INFO.format(os.environ.get("APPLICATION_CONFIG")))
+
+    cmdline = [sys.executable, "-m", "benchmarks"] + list(options)
+    subprocess.call(cmdline, cwd=BASE_DIR)
+
+
+@cli.command()
+@click.option("--url", default="http://localhost:5000", help="Service address")
+@click.option(
+    "--endpoint",
+    type=click.Choice(["ip-tags", "ip-tags-report", "all"]),
+    default="all",
+)
+@click.option(
+    "--distribution",
+    type=click.Choice(["uniform", "zipf", "uncovered"]),
+    default="zipf",
+    help="Distribution of requested IP addresses",
+)
+@click.option("--requests", "requests_count", type=click.IntRange(min=1), default=10000)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=16,
+    help="Number of client threads",
+)
+@click.option(
+    "--hot-set",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="Number of hot IPs (zipf)",
+)
+@click.option("--zipf-s", default=1.1, help="Exponent of Zipf distribution")
+@click.option("--seed", default=0)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=5.0,
+    help="Request timeout in seconds",
+)
+@click.option("--output", type=click.Path(), help="Save results to json file")
+def loadtest(
+    url,
+    endpoint,
+    distribution,
+    requests_count,
+    concurrency,
+    hot_set,
+    zipf_s,
+    seed,
+    timeout,
+    output,
+) -> None:
+    """Load test of /ip-tags endpoints of running local service"""
+    # IP addresses are drawn with the knowledge base from `DB_JSON_PATH`
+
+    from benchmarks.loadtest import ENDPOINTS, KnowledgeBase, generate_ips, run_loadtest
+
+    set_app_config(os.environ.get("APPLICATION_CONFIG"))
+    manage_logger.info(RUNNING_INFO.format(os.environ.get("APPLICATION_CONFIG")))
+
+    knowledge_base = KnowledgeBase(BASE_DIR / os.environ.get("DB_JSON_PATH"))
+    try:
+        ips = generate_ips(
+            knowledge_base, distribution, requests_count, hot_set, zipf_s, seed
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+
+    endpoints = list(ENDPOINTS) if endpoint == "all" else [endpoint]
+    paths = [
+        ENDPOINTS[endpoints[index % len(endpoints)]].format(ip)
+        for index, ip in enumerate(ips)
+    ]
+
+    results = run_loadtest(url, paths, concurrency, timeout)
+    results.update({"endpoint": endpoint, "distribution": distribution})
+
+    for key, value in results.items():
+        print(
+            f"{key:<16}{value:.3f}" if isinstance(value, float) else f"{key:<16}{value}"
+        )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=4)
+
+
 @cli.command()
 def run_dev():
     """TODO: Running app with initialised db and added sample data"""
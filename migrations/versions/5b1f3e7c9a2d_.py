@@ -0,0 +1,29 @@
+"""network_tags binary_network_part with C collation for prefix scans
+
+Revision ID: 5b1f3e7c9a2d
+Revises: ed9a404fcc79
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5b1f3e7c9a2d'
+down_revision = 'ed9a404fcc79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('network_tags', 'binary_network_part',
+               existing_type=sa.String(length=32),
+               type_=sa.String(length=32, collation='C'),
+               existing_nullable=False)
+
+
+def downgrade():
+    op.alter_column('network_tags', 'binary_network_part',
+               existing_type=sa.String(length=32, collation='C'),
+               type_=sa.String(length=32),
+               existing_nullable=False)
@@ -0,0 +1,33 @@
+"""tag_networks inverted index
+
+Revision ID: 8d4a2c61f0b7
+Revises: 5b1f3e7c9a2d
+Create Date: 2026-10-19 11:40:07.905113
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8d4a2c61f0b7'
+down_revision = '5b1f3e7c9a2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_networks',
+    sa.Column('tag', sa.Text(), nullable=False),
+    sa.Column('binary_network_part', sa.String(length=32, collation='C'), nullable=False),
+    sa.PrimaryKeyConstraint('tag', 'binary_network_part')
+    )
+    # filling in the index with already loaded data
+    op.execute(
+        "INSERT INTO tag_networks (tag, binary_network_part) "
+        "SELECT DISTINCT json_array_elements_text(tags::json), binary_network_part "
+        "FROM network_tags"
+    )
+
+
+def downgrade():
+    op.drop_table('tag_networks')
@@ -0,0 +1,57 @@
+"""network_tags change notifications suppressed in bulk changes
+
+Revision ID: a4d7c2e9b815
+Revises: e2a6f05c3b19
+Create Date: 2026-10-19 17:21:08.413297
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7c2e9b815'
+down_revision = 'e2a6f05c3b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # transactions of db-manage commands changing all the data set
+    # `network_tags.bulk_change` and send one notification instead
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_network_tags_changed() RETURNS trigger AS $$
+        BEGIN
+            IF current_setting('network_tags.bulk_change', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            ELSE
+                PERFORM pg_notify('network_tags_changed', NEW.binary_network_part);
+            END IF;
+            IF TG_OP = 'UPDATE'
+               AND OLD.binary_network_part <> NEW.binary_network_part THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_network_tags_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            ELSE
+                PERFORM pg_notify('network_tags_changed', NEW.binary_network_part);
+            END IF;
+            IF TG_OP = 'UPDATE'
+               AND OLD.binary_network_part <> NEW.binary_network_part THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
@@ -0,0 +1,43 @@
+"""network_tags change notifications for cache invalidation
+
+Revision ID: c7e91b3d5f48
+Revises: 8d4a2c61f0b7
+Create Date: 2026-10-19 14:02:33.761020
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c7e91b3d5f48'
+down_revision = '8d4a2c61f0b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_network_tags_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            ELSE
+                PERFORM pg_notify('network_tags_changed', NEW.binary_network_part);
+            END IF;
+            IF TG_OP = 'UPDATE'
+               AND OLD.binary_network_part <> NEW.binary_network_part THEN
+                PERFORM pg_notify('network_tags_changed', OLD.binary_network_part);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER network_tags_changed
+        AFTER INSERT OR UPDATE OR DELETE ON network_tags
+        FOR EACH ROW EXECUTE PROCEDURE notify_network_tags_changed();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS network_tags_changed ON network_tags;")
+    op.execute("DROP FUNCTION IF EXISTS notify_network_tags_changed();")
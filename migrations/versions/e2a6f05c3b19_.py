@@ -0,0 +1,33 @@
+"""binary_network_part up to 131 characters for IPv6 networks
+
+Revision ID: e2a6f05c3b19
+Revises: c7e91b3d5f48
+Create Date: 2026-10-19 15:47:12.530871
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6f05c3b19'
+down_revision = 'c7e91b3d5f48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('network_tags', 'tag_networks'):
+        op.alter_column(table, 'binary_network_part',
+                   existing_type=sa.String(length=32, collation='C'),
+                   type_=sa.String(length=131, collation='C'),
+                   existing_nullable=False)
+
+
+def downgrade():
+    op.execute("DELETE FROM tag_networks WHERE binary_network_part LIKE 'v6:%'")
+    op.execute("DELETE FROM network_tags WHERE binary_network_part LIKE 'v6:%'")
+    for table in ('network_tags', 'tag_networks'):
+        op.alter_column(table, 'binary_network_part',
+                   existing_type=sa.String(length=131, collation='C'),
+                   type_=sa.String(length=32, collation='C'),
+                   existing_nullable=False)
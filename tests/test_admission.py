@@ -0,0 +1,94 @@
+import pytest
+
+from application.admission import FrequencySketch, LocalCache, get_cache_timeout
+from application.utils import convert_ip_network_to_binary
+
+
+def test_frequency_sketch():
+    """
+    GIVEN frequency sketch
+    WHEN keys are accessed several times and sketch is reset
+    THEN check if their frequencies are counted (up to 15) and halved
+    """
+
+    sketch = FrequencySketch(1024)
+    for _ in range(3):
+        sketch.increment("0101")
+    for _ in range(20):
+        sketch.increment("1100")
+
+    assert sketch.frequency("0101") == 3
+    assert sketch.frequency("1100") == 15
+    assert sketch.frequency("1111") == 0
+
+    sketch.reset()
+
+    assert sketch.frequency("0101") == 1
+    assert sketch.frequency("1100") == 7
+
+
+def test_local_cache_admission():
+    """
+    GIVEN full local cache
+    WHEN entries of different frequencies are set
+    THEN check if only entries more frequent than the evicted ones are admitted
+    """
+
+    sketch = FrequencySketch(1024)
+    local_cache = LocalCache(2, 60, sketch)
+    for key, frequency in (("a", 2), ("b", 3), ("c", 1), ("d", 5)):
+        for _ in range(frequency):
+            sketch.increment(key)
+
+    local_cache.set_many({"a": "[]", "b": "[]"})
+    local_cache.set_many({"c": "[]"})
+
+    assert local_cache.get_many(["a", "b", "c"]) == {"a": "[]", "b": "[]"}
+
+    local_cache.set_many({"d": '["tag"]'})
+
+    assert local_cache.get_many(["a", "b", "d"]) == {"b": "[]", "d": '["tag"]'}
+
+
+@pytest.mark.parametrize(
+    "frequency, expected_timeout",
+    [(2, 3600), (3, 3600), (4, 7200), (8, 14400), (15, 14400)],
+)
+def test_get_cache_timeout(frequency, expected_timeout):
+    """
+    GIVEN cache timeout settings
+    WHEN getting expiration time of network part with given frequency
+    THEN check if it is doubled with doubled frequency, up to the maximum
+    """
+
+    config = {
+        "CACHE_ADMISSION_THRESHOLD": 2,
+        "CACHE_DEFAULT_TIMEOUT": 3600,
+        "CACHE_MAX_TIMEOUT": 14400,
+    }
+
+    assert get_cache_timeout(frequency, config) == expected_timeout
+
+
+def test_cache_admission(app, client, database, sample_data):
+    """
+    GIVEN working app with sample data
+    WHEN the same ip address is requested once and twice
+    THEN check if its network parts are cached only after the second lookup
+    """
+
+    binary_part = convert_ip_network_to_binary("198.51.100.1/32")
+    url = "http://127.0.0.1:5000/ip-tags/198.51.100.1"
+    app.cache.delete(binary_part)
+
+    response = client.get(url)
+
+    assert response.get_json() == []
+    assert app.cache.get(binary_part) is None
+    assert app.local_cache.get_many([binary_part]) == {}
+
+    response = client.get(url)
+
+    assert response.get_json() == []
+    assert app.cache.get(binary_part) == "[]"
+    assert app.local_cache.get_many([binary_part]) == {binary_part: "[]"}
@@ -1,7 +1,16 @@
+import threading
 from pathlib import Path
 
+import pytest
 from flask import Flask
 
+from application import lifecycle
+from application.index import network_index
+from application.invalidation import invalidate
+from application.lifecycle import preload
+from application.models import NetworkTag, db
+from application.utils import convert_ip_network_to_binary
+
 
 def test__app(app):
     """
@@ -27,4 +36,154 @@ def test__database(database):
     sql = "select count(9) from network_tags;"
     result = database.session.execute(sql).fetchone()
 
-    assert result[0] == 0
\ No newline at end of file
+    assert result[0] == 0
+
+
+def test__metrics(client, database, sample_data):
+    """
+    GIVEN working app with sample data
+    WHEN make request to endpoint /metrics after an ip-tags request
+    THEN check if metrics of lookups are in Prometheus format
+    """
+
+    client.get("http://127.0.0.1:5000/ip-tags/192.0.2.9")
+    response = client.get("http://127.0.0.1:5000/metrics")
+    response_data = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert (
+        'network_tags_request_latency_seconds_count{endpoint="endpoints.get_ip_tags"}'
+        in response_data
+    )
+    assert "network_tags_cache_lookups_total" in response_data
+    assert "network_tags_prefixes_fetched_bucket" in response_data
+
+
+def test__ready(client, database, sample_data):
+    """
+    GIVEN working app with sample data
+    WHEN make request to endpoint /ready after the first request
+    THEN check if worker is reported as ready
+    """
+
+    client.get("http://127.0.0.1:5000/ip-tags/192.0.2.9")
+    response = client.get("http://127.0.0.1:5000/ready")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"ready": True, "index": "disabled", "cache": "ready"}
+
+
+def test__ready_cache_unavailable(app, client, database, monkeypatch):
+    """
+    GIVEN working app with not responding memcached
+    WHEN make request to endpoint /ready
+    THEN check if worker is reported as ready with degraded cache
+    """
+
+    def version():
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(app.cache, "version", version)
+    response = client.get("http://127.0.0.1:5000/ready")
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "ready": True,
+        "index": "disabled",
+        "cache": "degraded",
+    }
+
+
+def test__ready_warm_up_failed(app, client, monkeypatch):
+    """
+    GIVEN working app without database tables (failing warm-up)
+    WHEN make request to endpoint /ready
+    THEN check if worker is reported as not ready and the request
+         does not retry warm-up
+    """
+
+    warm_ups = []
+    monkeypatch.setattr(lifecycle, "retry_warm_up", warm_ups.append)
+    with app.app_context():
+        db.drop_all()
+
+    response = client.get("http://127.0.0.1:5000/ready")
+    for thread in threading.enumerate():
+        if thread.name == "warm-up":
+            thread.join()
+
+    assert response.status_code == 503
+    assert response.get_json()["cache"] == "warming up"
+    assert warm_ups == [app]
+
+    monkeypatch.setattr(lifecycle, "warm_up", warm_ups.append)
+    client.get("http://127.0.0.1:5000/ready")
+
+    assert warm_ups == [app]
+
+
+def test__preloaded_index(app, client, database, sample_data):
+    """
+    GIVEN working app with sample data and enabled `PRELOAD_INDEX`
+    WHEN network is removed from database and invalidated
+    THEN check if lookups are served from index and it is refreshed
+    """
+
+    app.config["PRELOAD_INDEX"] = True
+    try:
+        preload(app)
+        assert len(network_index) == 7
+
+        response = client.get("http://127.0.0.1:5000/ip-tags/192.0.2.9")
+        assert response.get_json() == ["123 & abc & XQZ!", "{$(\n a-tag\n)$}"]
+
+        response = client.get("http://127.0.0.1:5000/ready")
+        assert response.get_json() == {
+            "ready": True,
+            "index": "ready",
+            "cache": "ready",
+        }
+
+        with app.app_context():
+            binary_part = convert_ip_network_to_binary("192.0.2.8/29")
+            NetworkTag.query.filter_by(binary_network_part=binary_part).delete()
+            db.session.commit()
+            invalidate([binary_part])
+
+        response = client.get("http://127.0.0.1:5000/ip-tags/192.0.2.9")
+        assert response.get_json() == ["{$(\n a-tag\n)$}"]
+
+    finally:
+        network_index.networks = None
+
+
+@pytest.mark.parametrize("data_changed", [False, True])
+def test__respawned_worker_index(app, database, sample_data, monkeypatch, data_changed):
+    """
+    GIVEN index preloaded in gunicorn master
+    WHEN worker is forked after the data have been (or not) changed
+    THEN check if the worker reloads index only if the data have been changed
+    """
+
+    # workers connect to the same memcached server as the master
+    monkeypatch.setattr(lifecycle, "setup_cache", lambda app: None)
+    app.config["PRELOAD_INDEX"] = True
+    try:
+        preload(app)
+        preloaded_networks = network_index.networks
+
+        binary_part = convert_ip_network_to_binary("192.0.2.8/29")
+        if data_changed:
+            with app.app_context():
+                NetworkTag.query.filter_by(binary_network_part=binary_part).delete()
+                db.session.commit()
+                NetworkTag.bump_dataset_generation()
+
+        lifecycle.init_worker(app)
+
+        assert (network_index.networks is preloaded_networks) is not data_changed
+        assert (binary_part in network_index.networks) is not data_changed
+
+    finally:
+        network_index.networks = None
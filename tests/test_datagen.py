@@ -0,0 +1,168 @@
+import io
+import ipaddress
+import json
+
+import pytest
+
+from application.datagen import generate_records, parse_prefix_lengths, write_records
+from application.db_commands.db_commands import generate_data
+
+
+def get_prefix_length(record: dict) -> int:
+    return int(record["ip_network"].split("/")[1])
+
+
+@pytest.mark.parametrize(
+    "spec, expected_distribution",
+    [
+        ("8:1,16:4,24:30", {8: 1.0, 16: 4.0, 24: 30.0}),
+        ("0:1,32", {0: 1.0, 32: 1.0}),
+        ("16:0,24:2.5", {16: 0.0, 24: 2.5}),
+    ],
+)
+def test_parse_prefix_lengths(spec, expected_distribution):
+    """
+    GIVEN valid prefix lengths distribution
+    WHEN parsing it
+    THEN check if weights of prefix lengths are returned (1 by default)
+    """
+
+    assert parse_prefix_lengths(spec) == expected_distribution
+
+
+@pytest.mark.parametrize("spec", ["33:1", "-1:1", "8:-1", "8:0", "8:0,16:0", "a:1"])
+def test_parse_prefix_lengths_invalid(spec):
+    """
+    GIVEN invalid prefix lengths distribution (out of range length,
+          negative weight or no positive weight)
+    WHEN parsing it
+    THEN check if ValueError is raised
+    """
+
+    with pytest.raises(ValueError):
+        parse_prefix_lengths(spec)
+
+
+def test_generate_data_invalid_prefix_lengths(app):
+    """
+    GIVEN prefix lengths distribution without positive weight
+    WHEN running `db-manage generate-data` command with it
+    THEN check if the option is rejected
+    """
+
+    result = app.test_cli_runner().invoke(
+        generate_data, ["-", "--prefix-lengths", "8:0"]
+    )
+
+    assert result.exit_code == 2
+    assert "--prefix-lengths" in result.output
+
+
+def test_generate_records_seed():
+    """
+    GIVEN seed of synthetic data
+    WHEN generating records twice with the same seed and with another one
+    THEN check if the same seed gives the same records
+    """
+
+    records = list(generate_records(500, seed=1))
+
+    assert list(generate_records(500, seed=1)) == records
+    assert list(generate_records(500, seed=2)) != records
+
+
+@pytest.mark.parametrize("prefix_lengths", ["24:1", "16:1,32:3", "8:0,28:1"])
+def test_generate_records_prefix_lengths(prefix_lengths):
+    """
+    GIVEN prefix lengths distribution
+    WHEN generating records without nesting
+    THEN check if networks have only lengths with positive weights
+         and their host bits are zeroed
+    """
+
+    records = list(
+        generate_records(500, seed=0, prefix_lengths=prefix_lengths, nesting_rate=0)
+    )
+    expected_lengths = {
+        length
+        for length, weight in parse_prefix_lengths(prefix_lengths).items()
+        if weight
+    }
+
+    assert {get_prefix_length(record) for record in records} == expected_lengths
+    for record in records:
+        ipaddress.IPv4Network(record["ip_network"])
+
+
+@pytest.mark.parametrize("duplicate_rate", [0, 0.5, 1])
+def test_generate_records_duplicates(duplicate_rate):
+    """
+    GIVEN part of duplicated records
+    WHEN generating records
+    THEN check if about given part of records repeats earlier ones
+    """
+
+    records = [
+        json.dumps(record)
+        for record in generate_records(
+            1000, seed=0, prefix_lengths="32:1", duplicate_rate=duplicate_rate
+        )
+    ]
+    duplicates = len(records) - len(set(records))
+
+    assert abs(duplicates - duplicate_rate * len(records)) <= 0.05 * len(records)
+    if duplicate_rate == 1:
+        assert set(records) == {records[0]}
+
+
+@pytest.mark.parametrize("unicode_rate", [0, 0.5, 1])
+def test_generate_records_unicode(unicode_rate):
+    """
+    GIVEN part of tags with unicode
+    WHEN generating records
+    THEN check if about given part of tags has non-ASCII characters
+    """
+
+    records = list(
+        generate_records(1000, seed=0, tags_count=1000, unicode_rate=unicode_rate)
+    )
+    tags = {record["tag"] for record in records}
+    unicode_tags = [tag for tag in tags if not tag.isascii()]
+
+    assert abs(len(unicode_tags) - unicode_rate * len(tags)) <= 0.1 * len(tags)
+
+
+@pytest.mark.parametrize("max_depth", [0, 1, 3])
+def test_generate_records_nesting(max_depth):
+    """
+    GIVEN maximal nesting depth of networks
+    WHEN generating only nested /8 networks (subnets one bit longer than parents)
+    THEN check if networks are nested up to given depth
+         and each nested network is a subnet of an earlier one
+    """
+
+    records = list(
+        generate_records(
+            500, seed=0, prefix_lengths="8:1", max_depth=max_depth, nesting_rate=1
+        )
+    )
+    networks = [ipaddress.IPv4Network(record["ip_network"]) for record in records]
+
+    assert max(network.prefixlen for network in networks) == 8 + max_depth
+    for index, network in enumerate(networks):
+        if network.prefixlen > 8:
+            assert any(network.subnet_of(parent) for parent in networks[:index])
+
+
+def test_write_records():
+    """
+    GIVEN generated records
+    WHEN writing them to file
+    THEN check if the file has json list of the records
+    """
+
+    records = list(generate_records(100, seed=0))
+    file = io.StringIO()
+
+    assert write_records(iter(records), file) == 100
+    assert json.loads(file.getvalue()) == records
@@ -0,0 +1,109 @@
+import gzip
+import io
+
+import pytest
+
+from application.db_commands.db_commands import dump, restore
+from application.dump import (
+    DUMP_HEADER,
+    DumpError,
+    DumpReader,
+    DumpWriter,
+)
+from application.models import NetworkTag, TagNetwork
+
+# rows in COPY text format, as written by PostgreSQL
+copy_rows = [
+    b'00001010\t["\\\\u2665"]\n',
+    b'110000000000000000000010\t["{$(\\\\n a-tag\\\\n)$}"]\n',
+    b'v6:00100000000000010000110110111000\t["IPv6 documentation"]\n',
+]
+
+
+def write_dump(rows: list) -> bytes:
+    file = io.BytesIO()
+    writer = DumpWriter(file)
+    for row in rows:
+        writer.write(row)
+    writer.finish()
+
+    return file.getvalue()
+
+
+@pytest.mark.parametrize("size", [-1, 1, 64, 8192])
+def test_dump_reader(size):
+    """
+    GIVEN dump written by DumpWriter
+    WHEN reading it by DumpReader in chunks of given size
+    THEN check if the same rows are read and checksum is verified
+    """
+
+    reader = DumpReader(io.BytesIO(write_dump(copy_rows)))
+
+    data = b""
+    while True:
+        chunk = reader.read(size)
+        if not chunk:
+            break
+        data += chunk
+
+    reader.verify()
+
+    assert data == b"".join(copy_rows)
+    assert reader.rows == 3
+
+
+@pytest.mark.parametrize(
+    "dump_data",
+    [
+        write_dump(copy_rows).replace(b"IPv6", b"IPv4"),
+        write_dump(copy_rows)[:-20],
+        write_dump(copy_rows).replace(DUMP_HEADER, b""),
+        b"",
+    ],
+)
+def test_dump_reader_damaged(dump_data):
+    """
+    GIVEN damaged, truncated or not a dump file
+    WHEN reading it by DumpReader
+    THEN check if DumpError is raised
+    """
+
+    with pytest.raises(DumpError):
+        reader = DumpReader(io.BytesIO(dump_data))
+        while reader.read(8192):
+            pass
+        reader.verify()
+
+
+def test_dump_restore(app, database, sample_data, tmp_path):
+    """
+    GIVEN working app with sample data
+    WHEN dumping data, removing them and restoring from the dump
+    THEN check if the same data are in the database
+    """
+
+    path = tmp_path / "network_tags.dump.gz"
+    runner = app.test_cli_runner()
+
+    with app.app_context():
+        network_tags = [(el.binary_network_part, el.tags) for el in NetworkTag.query]
+        tag_networks = [(el.tag, el.binary_network_part) for el in TagNetwork.query]
+
+        runner.invoke(dump, [str(path)])
+
+        with gzip.open(path) as file:
+            assert file.readline() == DUMP_HEADER
+
+        NetworkTag.query.delete()
+        database.session.commit()
+
+        runner.invoke(restore, [str(path), "--prime-cache"])
+
+        assert sorted(
+            (el.binary_network_part, el.tags) for el in NetworkTag.query
+        ) == sorted(network_tags)
+        assert sorted(
+            (el.tag, el.binary_network_part) for el in TagNetwork.query
+        ) == sorted(tag_networks)
+        assert app.cache.get(network_tags[0][0]) == network_tags[0][1]
@@ -0,0 +1,220 @@
+import importlib.util
+import select
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import text
+
+from application import invalidation, models
+from application.db_commands.db_commands import add_data, all_data_changing
+from application.invalidation import (
+    ALL_CHANGED_PAYLOAD,
+    NOTIFY_CHANNEL,
+    handle_notifications,
+    invalidate_all,
+    listen_for_changes,
+)
+from application.models import PREFIX_LENGTHS_KEY, NetworkTag, db
+from application.utils import convert_ip_network_to_binary
+
+MIGRATIONS_PATH = Path(__file__).parents[1] / "migrations" / "versions"
+
+# migrations creating `network_tags_changed` trigger and its function
+TRIGGER_REVISIONS = ["c7e91b3d5f48", "a4d7c2e9b815"]
+
+
+def wait_for(condition, timeout: float = 10):
+    """Waits until given condition is met, returns its last result"""
+
+    deadline = time.monotonic() + timeout
+    while not (result := condition()) and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+    return result
+
+
+@pytest.fixture
+def trigger(database):
+    """
+    Fixture trigger installs `network_tags_changed` trigger with SQL
+    of migrations (tables are created by `create_all`)
+    """
+
+    for revision in TRIGGER_REVISIONS:
+        spec = importlib.util.spec_from_file_location(
+            revision, MIGRATIONS_PATH / f"{revision}_.py"
+        )
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        migration.op = SimpleNamespace(
+            execute=lambda sql: database.session.execute(text(sql))
+        )
+        migration.upgrade()
+
+    database.session.commit()
+
+
+@pytest.fixture
+def listener(app):
+    """
+    Fixture listener returns function receiving payloads of notifications
+    about `network_tags` changes
+    """
+
+    with app.app_context():
+        connect_args = db.engine.url.translate_connect_args(
+            username="user", database="dbname"
+        )
+
+    conn = psycopg2.connect(**connect_args)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL};")
+
+    def receive() -> set:
+        payloads = set()
+        while select.select([conn], [], [], 1) != ([], [], []):
+            conn.poll()
+            while conn.notifies:
+                payloads.add(conn.notifies.pop().payload)
+
+        return payloads
+
+    yield receive
+    conn.close()
+
+
+def test_invalidate_all(app, monkeypatch):
+    """
+    GIVEN working app with cached network parts and prefix lengths
+    WHEN invalidating all the data
+    THEN check if in-process caches and prefix lengths are cleared
+         and invalidators are called for all the data
+    """
+
+    calls = []
+    monkeypatch.setattr(invalidation, "invalidators", [calls.append])
+
+    with app.app_context():
+        app.local_cache.set_many({"0101": "[]"})
+        app.cache.set(PREFIX_LENGTHS_KEY, {"v4": [4], "v6": []})
+        models.prefix_lengths["refresh_time"] = time.monotonic() + 60
+
+        invalidate_all()
+
+        assert app.local_cache.get_many(["0101"]) == {}
+        assert app.cache.get(PREFIX_LENGTHS_KEY) is None
+        assert models.prefix_lengths["refresh_time"] == 0
+        assert calls == [None]
+
+
+def test_trigger_invalidation(app, database, trigger, sample_data, listener):
+    """
+    GIVEN working app with sample data and installed trigger
+    WHEN network is changed in database and its notification is handled
+    THEN check if the network part is removed from memcached and local cache
+         and the dataset generation is bumped
+    """
+
+    listener()
+
+    with app.app_context():
+        binary_part = convert_ip_network_to_binary("192.0.2.8/29")
+        app.cache.set(binary_part, '["123 & abc & XQZ!"]')
+        app.local_cache.set_many({binary_part: '["123 & abc & XQZ!"]'})
+        generation = NetworkTag.get_dataset_generation()
+
+        NetworkTag.query.filter_by(binary_network_part=binary_part).update(
+            {"tags": '["changed"]'}
+        )
+        database.session.commit()
+
+        payloads = listener()
+        assert payloads == {binary_part}
+
+        handle_notifications(payloads)
+
+        assert app.cache.get(binary_part) is None
+        assert app.local_cache.get_many([binary_part]) == {}
+        assert NetworkTag.get_dataset_generation() > generation
+
+
+def test_all_data_changing(app, database, trigger, listener):
+    """
+    GIVEN working app with installed trigger
+    WHEN networks are added by `db-manage add-data` and in `all_data_changing`
+         block, while other session adds another network
+    THEN check if changes of the block are notified only as all the data
+         and changes of other session are still notified
+    """
+
+    app.test_cli_runner().invoke(add_data)
+
+    assert listener() == {ALL_CHANGED_PAYLOAD}
+
+    other_part = convert_ip_network_to_binary("198.18.0.0/15")
+    with app.app_context():
+        with all_data_changing():
+            database.session.add(
+                NetworkTag(
+                    binary_network_part=convert_ip_network_to_binary("198.51.0.0/16"),
+                    tags='["bulk"]',
+                )
+            )
+            database.session.commit()
+
+            with db.engine.begin() as connection:
+                connection.execute(
+                    NetworkTag.__table__.insert(),
+                    {"binary_network_part": other_part, "tags": '["other"]'},
+                )
+
+    assert listener() == {other_part, ALL_CHANGED_PAYLOAD}
+
+
+def test_listener_reconnect(app, database, monkeypatch):
+    """
+    GIVEN running listener of `network_tags` changes
+    WHEN its database connection is terminated
+    THEN check if it reconnects and invalidates all the data
+         with the new dataset generation
+    """
+
+    monkeypatch.setattr(invalidation, "RECONNECT_INTERVAL", 0.1)
+    stop = threading.Event()
+    thread = threading.Thread(target=listen_for_changes, args=(app, stop))
+    thread.start()
+
+    def get_listener_pid():
+        return database.session.execute(
+            text(
+                "SELECT pid FROM pg_stat_activity WHERE query = :query "
+                "AND pid <> pg_backend_pid()"
+            ),
+            {"query": f"LISTEN {NOTIFY_CHANNEL};"},
+        ).scalar()
+
+    try:
+        with app.app_context():
+            pid = wait_for(get_listener_pid)
+            assert pid is not None
+
+            app.local_cache.set_many({"0101": "[]"})
+            generation = NetworkTag.get_dataset_generation()
+
+            database.session.execute(
+                text("SELECT pg_terminate_backend(:pid)"), {"pid": pid}
+            )
+            database.session.commit()
+
+            assert wait_for(lambda: NetworkTag.get_dataset_generation() != generation)
+            assert app.local_cache.get_many(["0101"]) == {}
+
+    finally:
+        stop.set()
+        thread.join(10)
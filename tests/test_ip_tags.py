@@ -1,7 +1,10 @@
+import gzip
 from pathlib import Path
 
 import pytest
 
+from application.models import NetworkTag
+
 cases_ip_tags = [
     {
         "url": "http://127.0.0.1:5000/ip-tags/192.0.2.9",
@@ -12,6 +15,15 @@ cases_ip_tags = [
         "expected_data": ["{$(\n a-tag\n)$}"],
     },
     {"url": "http://127.0.0.1:5000/ip-tags/192.1.2.20", "expected_data": []},
+    {
+        "url": "http://127.0.0.1:5000/ip-tags/2001:db8:1::1",
+        "expected_data": ["IPv6 documentation", "zażółć"],
+    },
+    {
+        "url": "http://127.0.0.1:5000/ip-tags/2001:db8:2::1",
+        "expected_data": ["IPv6 documentation"],
+    },
+    {"url": "http://127.0.0.1:5000/ip-tags/2001:db9::1", "expected_data": []},
 ]
 
 cases_ip_tags_report = [
@@ -23,6 +35,10 @@ cases_ip_tags_report = [
         "url": "http://127.0.0.1:5000/ip-tags-report/192.0.2.20",
         "expected_data": "{$(\n a-tag\n)$}",
     },
+    {
+        "url": "http://127.0.0.1:5000/ip-tags-report/2001:db8:1::1",
+        "expected_data": "zażółć",
+    },
 ]
 
 
@@ -62,7 +78,137 @@ def test_get_ip_tags_invalid_ip(client, database):
     assert response.headers["Content-Type"] == "application/json"
     assert (
         response_data["error"]
-        == "400 Bad Request: Address 10.1.2.3000 does not have IPv4 format"
+        == "400 Bad Request: Address 10.1.2.3000 does not have IPv4 or IPv6 format"
+    )
+
+
+cases_ip_tags_longest = [
+    {"ip": "192.0.2.9", "expected_data": ["123 & abc & XQZ!"]},
+    {"ip": "192.0.2.20", "expected_data": ["{$(\n a-tag\n)$}"]},
+    {"ip": "2001:db8:1::1", "expected_data": ["zażółć"]},
+    {"ip": "2001:db8:2::1", "expected_data": ["IPv6 documentation"]},
+    {"ip": "2001:db9::1", "expected_data": []},
+]
+
+
+@pytest.mark.parametrize(
+    "ip, expected_data",
+    [(case["ip"], case["expected_data"]) for case in cases_ip_tags_longest],
+)
+@pytest.mark.parametrize("warm_up", [None, "all", "longest"])
+def test_get_ip_tags_longest(client, database, sample_data, ip, expected_data, warm_up):
+    """
+    GIVEN working app with sample data (and cache warmed up by
+          a previous request in given match mode)
+    WHEN make request to endpoint /ip-tags/ip?match=longest
+    THEN check if only tags of the longest covering network are returned
+    """
+
+    if warm_up:
+        client.get(f"http://127.0.0.1:5000/ip-tags/{ip}?match={warm_up}")
+
+    response = client.get(f"http://127.0.0.1:5000/ip-tags/{ip}?match=longest")
+
+    assert response.status_code == 200
+    assert response.get_json() == expected_data
+
+
+def test_get_ip_tags_invalid_match(client, database):
+    """
+    GIVEN working app
+    WHEN make a request with not supported match mode
+    THEN check if status code is set on 400 with apriopriate error message
+    """
+
+    response = client.get("http://127.0.0.1:5000/ip-tags/10.0.0.1?match=shortest")
+
+    assert response.status_code == 400
+    assert (
+        response.get_json()["error"]
+        == "400 Bad Request: Match mode shortest is not supported"
+    )
+
+
+@pytest.mark.parametrize(
+    "match, expected_data",
+    [
+        (
+            None,
+            {
+                "192.0.2.9": ["123 & abc & XQZ!", "{$(\n a-tag\n)$}"],
+                "2001:db8:1::1": ["IPv6 documentation", "zażółć"],
+                "198.51.100.1": [],
+            },
+        ),
+        (
+            "longest",
+            {
+                "192.0.2.9": ["123 & abc & XQZ!"],
+                "2001:db8:1::1": ["zażółć"],
+                "198.51.100.1": [],
+            },
+        ),
+    ],
+)
+def test_post_ip_tags(client, database, sample_data, match, expected_data):
+    """
+    GIVEN working app with sample data
+    WHEN make POST request to endpoint /ip-tags with list of ips
+    THEN check if tags of each ip are returned
+    """
+
+    body = {"ips": list(expected_data)}
+    if match:
+        body["match"] = match
+
+    response = client.post("http://127.0.0.1:5000/ip-tags", json=body)
+
+    assert response.status_code == 200
+    assert response.get_json() == expected_data
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        ({"ip": "10.0.0.1"}, "Request body should have `ips` list of addresses"),
+        ({"ips": ["10.0.0.1", 1]}, "Request body should have `ips` list of addresses"),
+        (
+            {"ips": ["10.0.0.1", "10.0.0.256"]},
+            "Address 10.0.0.256 does not have IPv4 or IPv6 format",
+        ),
+        ({"ips": ["10.0.0.1"], "match": "any"}, "Match mode any is not supported"),
+    ],
+)
+def test_post_ip_tags_invalid(client, database, body, error):
+    """
+    GIVEN working app
+    WHEN make POST request to endpoint /ip-tags with invalid body
+    THEN check if status code is set on 400 with apriopriate error message
+    """
+
+    response = client.post("http://127.0.0.1:5000/ip-tags", json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == f"400 Bad Request: {error}"
+
+
+def test_post_ip_tags_error(client, database, sample_data, monkeypatch):
+    """
+    GIVEN working app with failing lookup of tags
+    WHEN make POST request to endpoint /ip-tags with list of addresses
+    THEN check if status code is set on 500 with error message
+    """
+
+    def get_tags_for_ips(ips, match, binary_ips=None):
+        raise RuntimeError("lookup failed")
+
+    monkeypatch.setattr(NetworkTag, "get_tags_for_ips", get_tags_for_ips)
+
+    response = client.post("http://127.0.0.1:5000/ip-tags", json={"ips": ["10.0.0.1"]})
+
+    assert response.status_code == 500
+    assert response.get_json()["error"] == (
+        "500 Internal Server Error: Error in getting tags of addresses"
     )
 
 
@@ -89,3 +235,80 @@ def test__get_ip_tags_report(client, database, sample_data, url, expected_data):
 # TODO: test__get_ip_tags_report_invalid_ipv4
 # TODO: Checking db_commands blueprint
 # TODO: Checking errors blueprint
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1:5000/ip-tags/192.0.2.9",
+        "http://127.0.0.1:5000/ip-tags-report/192.0.2.9",
+        "http://127.0.0.1:5000/ip-tags/192.0.2.9%0A",
+        "http://127.0.0.1:5000/ip-tags/2001:db8::1",
+    ],
+)
+def test_get_ip_tags_not_modified(client, database, sample_data, url):
+    """
+    GIVEN working app with sample data
+    WHEN make a request with ETag returned by previous request
+    THEN check if status code is set on 304 and response has no body
+    """
+
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.get_data() == b""
+
+
+def test__get_ip_tags_report_compressed(app, client, database, sample_data):
+    """
+    GIVEN working app with sample data and enabled report compression
+    WHEN make request to endpoint /ip-tags-report/ip accepting gzip encoding
+    THEN check if response is compressed and equal to not compressed one
+    """
+
+    url = "http://127.0.0.1:5000/ip-tags-report/192.0.2.20"
+    app.config["REPORT_COMPRESSION"] = True
+
+    response = client.get(url)
+    compressed_response = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert compressed_response.status_code == 200
+    assert compressed_response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed_response.get_data()) == response.get_data()
+
+
+def test__get_ip_tags_report_compressed_not_modified(
+    app, client, database, sample_data
+):
+    """
+    GIVEN working app with sample data and enabled report compression
+    WHEN make requests with ETag of compressed and not compressed report
+    THEN check if ETags differ by encoding and 304 response varies by encoding
+    """
+
+    url = "http://127.0.0.1:5000/ip-tags-report/192.0.2.20"
+    app.config["REPORT_COMPRESSION"] = True
+
+    etag = client.get(url).headers["ETag"]
+    gzip_etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    assert gzip_etag != etag
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = client.get(
+        url, headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == gzip_etag
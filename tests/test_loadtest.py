@@ -0,0 +1,190 @@
+import ipaddress
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from benchmarks.datasets import ipv4_to_int
+from benchmarks.loadtest import KnowledgeBase, generate_ips, percentile, run_loadtest
+
+NETWORKS = ["10.0.0.0/8", "192.0.2.0/24", "198.51.100.7/32", "2001:db8::/32"]
+
+
+def make_knowledge_base(tmp_path, networks: list) -> KnowledgeBase:
+    path = tmp_path / "db.json"
+    path.write_text(
+        json.dumps([{"tag": "tag", "ip_network": network} for network in networks])
+    )
+    return KnowledgeBase(path)
+
+
+def is_covered(ip: str) -> bool:
+    return any(
+        ipaddress.IPv4Address(ip) in ipaddress.ip_network(network)
+        for network in NETWORKS[:3]
+    )
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    """Fixture knowledge_base returning knowledge base with a few networks"""
+
+    return make_knowledge_base(tmp_path, NETWORKS)
+
+
+@pytest.mark.parametrize(
+    "ip, expected_covered",
+    [
+        ("10.1.2.3", True),
+        ("11.0.0.0", False),
+        ("192.0.2.255", True),
+        ("192.0.3.0", False),
+        ("198.51.100.7", True),
+        ("198.51.100.6", False),
+    ],
+)
+def test_knowledge_base_is_covered(knowledge_base, ip, expected_covered):
+    """
+    GIVEN knowledge base with IPv4 and IPv6 networks
+    WHEN checking if IP address is covered by any of them
+    THEN check if only addresses from IPv4 networks are covered
+    """
+
+    assert knowledge_base.is_covered(ipv4_to_int(ip)) == expected_covered
+
+
+def test_knowledge_base_random(knowledge_base):
+    """
+    GIVEN knowledge base with IPv4 and IPv6 networks
+    WHEN drawing covered and uncovered IP addresses
+    THEN check if they are (not) covered by the IPv4 networks
+    """
+
+    rand = random.Random(0)
+
+    assert len(knowledge_base.networks) == 3
+    for _ in range(100):
+        assert knowledge_base.is_covered(knowledge_base.random_covered(rand))
+        assert not knowledge_base.is_covered(knowledge_base.random_uncovered(rand))
+
+
+def test_knowledge_base_without_ipv4_networks(tmp_path):
+    """
+    GIVEN knowledge base with only IPv6 networks
+    WHEN drawing covered IP address
+    THEN check if ValueError is raised
+    """
+
+    knowledge_base = make_knowledge_base(tmp_path, ["2001:db8::/32"])
+
+    with pytest.raises(ValueError, match="no IPv4 networks"):
+        knowledge_base.random_covered(random.Random(0))
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "zipf", "uncovered"])
+def test_generate_ips_seed(knowledge_base, distribution):
+    """
+    GIVEN distribution of IP addresses
+    WHEN generating addresses twice with the same seed and with another one
+    THEN check if given number of IPv4 addresses is returned
+         and the same seed gives the same addresses
+    """
+
+    ips = generate_ips(knowledge_base, distribution, 500, 50, 1.1, seed=1)
+
+    assert len(ips) == 500
+    for ip in ips:
+        ipaddress.IPv4Address(ip)
+    assert generate_ips(knowledge_base, distribution, 500, 50, 1.1, seed=1) == ips
+    assert generate_ips(knowledge_base, distribution, 500, 50, 1.1, seed=2) != ips
+
+
+def test_generate_ips_zipf(knowledge_base):
+    """
+    GIVEN zipf distribution with hot set of IP addresses
+    WHEN generating addresses
+    THEN check if they are covered, come from the hot set
+         and the most popular address repeats most often
+    """
+
+    ips = generate_ips(knowledge_base, "zipf", 5000, 20, 1.1, seed=0)
+    counts = Counter(ips).most_common()
+
+    assert all(is_covered(ip) for ip in ips)
+    assert len(counts) <= 20
+    assert counts[0][1] > 5000 / 20 > counts[-1][1]
+
+
+def test_generate_ips_uncovered(knowledge_base):
+    """
+    GIVEN uncovered distribution
+    WHEN generating addresses
+    THEN check if about 10% of them is covered by the knowledge base
+    """
+
+    ips = generate_ips(knowledge_base, "uncovered", 5000, 50, 1.1, seed=0)
+    covered = sum(is_covered(ip) for ip in ips)
+
+    assert abs(covered - 0.1 * len(ips)) <= 0.02 * len(ips)
+
+
+@pytest.mark.parametrize(
+    "distribution, count, hot_set",
+    [("normal", 10, 10), ("uniform", 0, 10), ("zipf", -1, 10), ("zipf", 10, 0)],
+)
+def test_generate_ips_invalid(knowledge_base, distribution, count, hot_set):
+    """
+    GIVEN unknown distribution, not positive number of addresses
+          or size of hot set
+    WHEN generating addresses
+    THEN check if ValueError is raised
+    """
+
+    with pytest.raises(ValueError):
+        generate_ips(knowledge_base, distribution, count, hot_set, 1.1, seed=0)
+
+
+@pytest.mark.parametrize(
+    "latencies, value, expected_ms",
+    [
+        ([0.001], 0.5, 1),
+        ([0.001], 0.99, 1),
+        ([i / 1000 for i in range(1, 101)], 0.5, 51),
+        ([i / 1000 for i in range(1, 101)], 0.95, 96),
+        ([i / 1000 for i in range(1, 101)], 0.99, 100),
+        ([i / 1000 for i in range(1, 101)], 1, 100),
+        ([0.001, 0.002, 0.003], 0.5, 2),
+    ],
+)
+def test_percentile(latencies, value, expected_ms):
+    """
+    GIVEN sorted latencies in seconds
+    WHEN computing their percentile
+    THEN check if latency in milliseconds is returned
+    """
+
+    assert percentile(latencies, value) == pytest.approx(expected_ms)
+
+
+def test_percentile_empty():
+    """
+    GIVEN no latencies
+    WHEN computing their percentile
+    THEN check if ValueError is raised
+    """
+
+    with pytest.raises(ValueError):
+        percentile([], 0.5)
+
+
+@pytest.mark.parametrize("paths, concurrency", [([], 1), (["/ip-tags/10.0.0.1"], 0)])
+def test_run_loadtest_invalid(paths, concurrency):
+    """
+    GIVEN no paths to request or not positive concurrency
+    WHEN running load test
+    THEN check if ValueError is raised before sending any request
+    """
+
+    with pytest.raises(ValueError):
+        run_loadtest("http://127.0.0.1:1", paths, concurrency, timeout=1)
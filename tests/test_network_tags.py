@@ -0,0 +1,209 @@
+import pytest
+
+from application import models
+from application.models import (
+    DATASET_GENERATION_KEY,
+    PREFIX_LENGTHS_KEY,
+    PREFIX_LENGTHS_LOCK_KEY,
+    NetworkTag,
+)
+
+cases_network_tags = [
+    {
+        "url": "http://127.0.0.1:5000/network-tags/192.0.0.0/8",
+        "expected_data": {
+            "networks": [
+                {"ip_network": "192.0.2.0/24", "tags": ["{$(\n a-tag\n)$}"]},
+                {"ip_network": "192.0.2.8/29", "tags": ["123 & abc & XQZ!"]},
+            ],
+            "next": None,
+        },
+    },
+    {
+        "url": "http://127.0.0.1:5000/network-tags/192.0.2.8/30",
+        "expected_data": {
+            "networks": [
+                {"ip_network": "192.0.2.0/24", "tags": ["{$(\n a-tag\n)$}"]},
+                {"ip_network": "192.0.2.8/29", "tags": ["123 & abc & XQZ!"]},
+            ],
+            "next": None,
+        },
+    },
+    {
+        "url": "http://127.0.0.1:5000/network-tags/0.0.0.0/0?limit=2",
+        "expected_data": {
+            "networks": [
+                {"ip_network": "10.0.0.0/8", "tags": ["♥"]},
+                {"ip_network": "192.0.2.0/24", "tags": ["{$(\n a-tag\n)$}"]},
+            ],
+            "next": "192.0.2.0/24",
+        },
+    },
+    {
+        "url": "http://127.0.0.1:5000/network-tags/0.0.0.0/0?after=198.51.100.227/32",
+        "expected_data": {
+            "networks": [{"ip_network": "203.0.113.0/24", "tags": ["zażółć"]}],
+            "next": None,
+        },
+    },
+    {
+        "url": "http://127.0.0.1:5000/network-tags/172.16.0.0/12",
+        "expected_data": {"networks": [], "next": None},
+    },
+    {
+        "url": "http://127.0.0.1:5000/network-tags/2001:db8:1:2::/64",
+        "expected_data": {
+            "networks": [
+                {"ip_network": "2001:db8::/32", "tags": ["IPv6 documentation"]},
+                {"ip_network": "2001:db8:1::/48", "tags": ["zażółć"]},
+            ],
+            "next": None,
+        },
+    },
+]
+
+
+@pytest.mark.parametrize(
+    "url, expected_data",
+    [(case["url"], case["expected_data"]) for case in cases_network_tags],
+)
+def test_get_network_tags(client, database, sample_data, url, expected_data):
+    """
+    GIVEN working app with sample data
+    WHEN make request to endpoint /network-tags/network
+    THEN check if status code and Content-type are ok
+         and networks contained in or covering given network are returned
+    """
+
+    response = client.get(url)
+    response_data = response.get_json()
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert response_data == expected_data
+
+
+def test_get_network_tags_invalid_network(client, database):
+    """
+    GIVEN working app
+    WHEN make a request with invalid ip network address
+    THEN check if status code is set on 400 and response is in
+         json with apriopriate error message
+    """
+
+    response = client.get("http://127.0.0.1:5000/network-tags/10.0.0.0/33")
+    response_data = response.get_json()
+
+    assert response.status_code == 400
+    assert response.headers["Content-Type"] == "application/json"
+    assert (
+        response_data["error"]
+        == "400 Bad Request: Network 10.0.0.0/33 does not have CIDR format"
+    )
+
+
+cases_tag_networks = [
+    {
+        "url": "http://127.0.0.1:5000/tags/123 %26 abc %26 XQZ!/networks",
+        "expected_data": ["192.0.2.8/29"],
+    },
+    {
+        "url": "http://127.0.0.1:5000/tags/%E2%99%A5/networks",
+        "expected_data": ["10.0.0.0/8"],
+    },
+    {
+        "url": "http://127.0.0.1:5000/tags/%7B%24(%0A a-tag%0A)%24%7D/networks",
+        "expected_data": ["192.0.2.0/24"],
+    },
+    {"url": "http://127.0.0.1:5000/tags/unknown/networks", "expected_data": []},
+]
+
+
+@pytest.mark.parametrize(
+    "url, expected_data",
+    [(case["url"], case["expected_data"]) for case in cases_tag_networks],
+)
+def test_get_tag_networks(client, database, sample_data, url, expected_data):
+    """
+    GIVEN working app with sample data
+    WHEN make request to endpoint /tags/tag/networks
+    THEN check if status code and Content-type are ok
+         and networks linked with given tag are returned
+    """
+
+    response = client.get(url)
+    response_data = response.get_json()
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert response_data == expected_data
+
+
+def test_prefix_lengths_lock(app, database, sample_data, monkeypatch):
+    """
+    GIVEN working app with sample data and prefix lengths known in process
+    WHEN prefix lengths are missing in cache and being computed by other process
+    THEN check if known lengths are used without querying database,
+         and computed lengths are cached with expiration time
+    """
+
+    with app.app_context():
+        NetworkTag.reset_prefix_lengths()
+        lengths = NetworkTag.get_prefix_lengths("v4")
+
+        assert lengths == [8, 24, 29, 32]
+
+        def query_prefix_lengths():
+            raise AssertionError("prefix lengths queried")
+
+        NetworkTag.reset_prefix_lengths()
+        app.cache.add(PREFIX_LENGTHS_LOCK_KEY, 1)
+        with monkeypatch.context() as patch:
+            patch.setattr(NetworkTag, "_query_prefix_lengths", query_prefix_lengths)
+
+            assert NetworkTag.get_prefix_lengths("v4") == lengths
+
+        cache_sets = []
+        set_in_cache = app.cache.set
+
+        def set_with_expire(key, value, expire=0):
+            cache_sets.append((key, expire))
+            return set_in_cache(key, value, expire=expire)
+
+        monkeypatch.setattr(app.cache, "set", set_with_expire)
+        app.cache.delete(PREFIX_LENGTHS_LOCK_KEY)
+        models.prefix_lengths["refresh_time"] = 0
+
+        assert NetworkTag.get_prefix_lengths("v4") == lengths
+        assert cache_sets == [(PREFIX_LENGTHS_KEY, app.config["CACHE_DEFAULT_TIMEOUT"])]
+        assert app.cache.get(PREFIX_LENGTHS_LOCK_KEY) is None
+
+
+@pytest.mark.parametrize("listener", [False, True])
+def test_dataset_generation_timeout(app, monkeypatch, listener):
+    """
+    GIVEN working app with or without invalidation listener
+    WHEN the new dataset generation is started
+    THEN check if it expires with cached networks only without the listener
+    """
+
+    app.config["CACHE_INVALIDATION_LISTENER"] = listener
+    cache_adds = []
+    add_to_cache = app.cache.add
+
+    def add_with_expire(key, value, expire=0):
+        cache_adds.append((key, expire))
+        return add_to_cache(key, value, expire=expire)
+
+    monkeypatch.setattr(app.cache, "add", add_with_expire)
+
+    with app.app_context():
+        app.cache.delete(DATASET_GENERATION_KEY)
+
+        assert NetworkTag.get_dataset_generation() is not None
+        assert cache_adds == [
+            (
+                DATASET_GENERATION_KEY,
+                0 if listener else app.config["CACHE_DEFAULT_TIMEOUT"],
+            )
+        ]
@@ -0,0 +1,66 @@
+import logging
+import pstats
+
+import pytest
+
+from application.profiling import PROFILE_HEADER, setup_profiling
+
+
+@pytest.fixture
+def profiling_app(app, tmp_path):
+    """Fixture profiling_app returning the app with enabled profiling"""
+
+    app.config.update(
+        PROFILING_ENABLED=True,
+        PROFILE_SAMPLE_RATE=0,
+        PROFILE_DIR=tmp_path / "profiles",
+        SLOW_REQUEST_THRESHOLD_MS=10000,
+    )
+    setup_profiling(app)
+
+    return app
+
+
+def test_profiled_request(profiling_app, client, database, sample_data):
+    """
+    GIVEN working app with enabled profiling
+    WHEN make requests with and without `X-Profile` header
+    THEN check if profile is saved only for the request with the header
+    """
+
+    url = "http://127.0.0.1:5000/ip-tags/192.0.2.9"
+    profile_dir = profiling_app.config["PROFILE_DIR"]
+
+    assert client.get(url).status_code == 200
+    assert list(profile_dir.iterdir()) == []
+
+    assert client.get(url, headers={PROFILE_HEADER: "1"}).status_code == 200
+
+    profiles = list(profile_dir.glob("*.prof"))
+    assert len(profiles) == 1
+    assert "endpoints.get_ip_tags" in profiles[0].name
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
+
+
+def test_slow_request(profiling_app, client, database, sample_data, caplog):
+    """
+    GIVEN working app with enabled profiling and zero slow request threshold
+    WHEN make request to endpoint /ip-tags/ip
+    THEN check if the request is logged as slow with time of its stages
+    """
+
+    profiling_app.config["SLOW_REQUEST_THRESHOLD_MS"] = 0
+
+    with caplog.at_level(logging.WARNING, logger=profiling_app.logger.name):
+        response = client.get("http://127.0.0.1:5000/ip-tags/192.0.2.9")
+
+    assert response.status_code == 200
+
+    messages = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("Slow request /ip-tags/192.0.2.9")
+    ]
+    assert len(messages) == 1
+    for stage in ("validation", "etag", "encode"):
+        assert f" {stage}=" in messages[0]
@@ -0,0 +1,38 @@
+import json
+from itertools import combinations
+from pathlib import Path
+
+import pytest
+from flask import jsonify
+
+from application.endpoints.responses import tags_response
+
+SAMPLES_PATH = Path(__file__).resolve().parent.parent / "samples"
+
+with open(SAMPLES_PATH / "db1000.json") as file:
+    sample_tags = sorted(set(el["tag"] for el in json.load(file)))
+
+cases_tags = [
+    [],
+    ["♥"],
+    ["123 & abc & XQZ!", "{$(\n a-tag\n)$}"],
+    ['\x00\x1f\x7f"\\/'],
+    sample_tags[:10],
+    sample_tags,
+] + [list(pair) for pair in combinations(sample_tags[:20], 2)]
+
+
+@pytest.mark.parametrize("tags", cases_tags)
+def test_tags_response(app, tags):
+    """
+    GIVEN an instance of Flask app
+    WHEN tags are encoded to JSON response
+    THEN check if response is byte-identical to the `jsonify` one
+    """
+
+    with app.test_request_context():
+        response = tags_response(tags)
+        expected_response = jsonify(tags)
+
+    assert response.headers["Content-Type"] == "application/json"
+    assert response.get_data() == expected_response.get_data()
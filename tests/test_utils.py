@@ -0,0 +1,75 @@
+import pytest
+
+from application.utils import (
+    IPV4_RE,
+    convert_ip_to_binary,
+    convert_ips_to_binary,
+    convert_ipv4_to_binary,
+    is_valid_ipv4,
+    parse_ipv4,
+)
+
+cases_ipv4 = [
+    "0.0.0.0",
+    "255.255.255.255",
+    "10.0.0.1",
+    "192.0.2.9",
+    "192.0.2.9\n",
+    "192.0.2.9\n\n",
+    "\n192.0.2.9",
+    "192.0.2.9 ",
+    " 192.0.2.9",
+    "192.0.2.09",
+    "192.0.2.256",
+    "192.0.2.1000",
+    "192.0.2",
+    "192.0.2.9.1",
+    "192.0.2.",
+    "192..2.9",
+    "1.2.3.+4",
+    "1.2.3.-4",
+    "0x1.2.3.4",
+    "1.2.3.4/32",
+    "1.2.3.٤",
+    "1.2.3.²",
+    "1.2.3.4\x00",
+    "1.2.3.\ud800",
+    "2001:db8::1",
+    "::ffff:1.2.3.4",
+    "",
+]
+
+
+@pytest.mark.parametrize("ip", cases_ipv4)
+def test_parse_ipv4(ip):
+    """
+    GIVEN string with (possibly invalid) IPv4 address
+    WHEN parsing and converting it
+    THEN check if it is accepted like by `IPV4_RE`
+         and converted to the same number and bits as octet by octet
+    """
+
+    if IPV4_RE.match(ip):
+        octets = [int(octet) for octet in ip.split(".")]
+        expected_bits = "".join(format(octet, "08b") for octet in octets)
+
+        assert is_valid_ipv4(ip)
+        assert parse_ipv4(ip) == int(expected_bits, 2)
+        assert convert_ipv4_to_binary(ip) == expected_bits
+
+    else:
+        assert not is_valid_ipv4(ip)
+        assert parse_ipv4(ip) is None
+        assert convert_ipv4_to_binary(ip) == ""
+
+
+def test_convert_ips_to_binary():
+    """
+    GIVEN list of IPv4, IPv6 and invalid addresses
+    WHEN converting them in bulk
+    THEN check if they are converted like one by one
+    """
+
+    ips = ["192.0.2.9", "2001:db8::1", "192.0.2.09", "1.2.3.4\n", "::1%eth0"]
+
+    assert convert_ips_to_binary(ips) == [convert_ip_to_binary(ip) for ip in ips]